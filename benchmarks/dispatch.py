@@ -0,0 +1,201 @@
+"""
+Requests per second and latency percentiles of resolve_path, dispatcher and factory against an in-memory table (benchmarks.fake)
+The trees are a chain of nodes as deep as each depth and a node with as many children as each fan-out
+
+python -m benchmarks.dispatch [--depths 1 5 10 20] [--fanouts 10 100 1000 10000] [--requests 200] [--concurrency 1]
+  [--config CACHE_SIZE=1000 ...] [--output results.json] [--compare previous.json]
+"""
+from argparse import ArgumentParser
+from asyncio import gather, get_event_loop, new_event_loop, set_event_loop
+from inspect import isawaitable
+from json import dump, load, loads
+from platform import python_version
+from subprocess import CalledProcessError, check_output
+from time import perf_counter
+
+from bson import ObjectId
+
+from ySanic import MongoySanic
+from benchmarks import models
+from benchmarks.fake import FakeTable
+
+class BenchRequest:
+  """What dispatcher, factory and the models' decorators read from a request"""
+  def __init__(self, app, method, path, json = None):
+    self.app = app
+    self.method = method
+    self.path = path
+    self.json = json if json is not None else {}
+    self.headers = {}
+    self.args = {}
+    self.cookies = {}
+
+def chain(depth):
+  """The root and a chain of depth nodes (/n1, /n1/n2...) as (docs, url of the deepest one)"""
+  docs = [{"_id": ObjectId(), "type": "Root", "path": "", "slug": "", "name": "", "nodes": ["n1"]}]
+  path = "/"
+  for level in range(1, depth + 1):
+    docs.append({"_id": ObjectId(), "type": "Node", "path": path, "slug": "n{}".format(level), "name": "Node {}".format(level),
+      "nodes": ["n{}".format(level + 1)] if level < depth else []})
+    path = "{}{}n{}".format(path, "" if path == "/" else "/", level)
+
+  return docs, path
+
+def wide(fanout):
+  """The root, a node (/wide) and fanout children of it as (docs, url of the node)"""
+  slugs = ["c{}".format(idx) for idx in range(fanout)]
+  docs = [
+    {"_id": ObjectId(), "type": "Root", "path": "", "slug": "", "name": "", "nodes": ["wide"]},
+    {"_id": ObjectId(), "type": "Node", "path": "/", "slug": "wide", "name": "Wide", "nodes": slugs}
+  ]
+  docs.extend({"_id": ObjectId(), "type": "Node", "path": "/wide", "slug": slug, "name": slug} for slug in slugs)
+  return docs, "/wide"
+
+def percentile(latencies, q):
+  return latencies[min(len(latencies) - 1, int(round(q * (len(latencies) - 1))))]
+
+async def start(app):
+  for listener in app.listeners["before_server_start"]:
+    result = listener(app, get_event_loop())
+    if isawaitable(result):
+      await result
+
+def make_app(docs, config):
+  table = FakeTable(docs)
+  app = MongoySanic(models, name = "dispatch_benchmark", table = table)
+  app.config.DEBUG_EMAILS = True
+  app.config.update(config)
+  return app, table
+
+async def measure(app, table, call, requests, concurrency, max_seconds):
+  """Runs call(idx) requests times (concurrency at once) or until max_seconds are gone, whatever happens first"""
+  latencies = []
+  queries = table.queries
+  deadline = perf_counter() + max_seconds
+  counter = iter(range(requests))
+
+  async def worker():
+    for idx in counter:
+      started = perf_counter()
+      await call(idx)
+      latencies.append(perf_counter() - started)
+      if perf_counter() > deadline:
+        break
+
+  started = perf_counter()
+  await gather(*[worker() for _ in range(concurrency)])
+  elapsed = perf_counter() - started
+
+  latencies.sort()
+  return {
+    "requests": len(latencies),
+    "rps": len(latencies) / elapsed,
+    "p50_ms": percentile(latencies, 0.5) * 1000,
+    "p90_ms": percentile(latencies, 0.9) * 1000,
+    "p99_ms": percentile(latencies, 0.99) * 1000,
+    "max_ms": latencies[-1] * 1000,
+    "queries": (table.queries - queries) / len(latencies)
+  }
+
+def checked(response, status):
+  if response.status != status:
+    raise RuntimeError("Expected {} and got {}: {}".format(status, response.status, response.body[:200]))
+
+async def scenarios(depths, fanouts, config, requests, concurrency, max_seconds):
+  results = []
+
+  for depth in depths:
+    docs, url = chain(depth)
+
+    app, table = make_app(docs, config)
+    await start(app)
+    async def resolve(idx):
+      if await app.resolve_path(url) is None:
+        raise RuntimeError("{} not resolved".format(url))
+    results.append(dict(scenario = "resolve_path", depth = depth, fanout = 0,
+      **await measure(app, table, resolve, requests, concurrency, max_seconds)))
+
+    async def call(idx):
+      checked(await app.dispatcher(BenchRequest(app, "GET", url)), 200)
+    results.append(dict(scenario = "dispatcher", depth = depth, fanout = 0,
+      **await measure(app, table, call, requests, concurrency, max_seconds)))
+
+    # a new tree so the children created don't change the other scenarios
+    app, table = make_app(docs, config)
+    await start(app)
+    async def create(idx):
+      body = {"name": "New {}".format(idx), "slug": "new-{}".format(idx)}
+      checked(await app.factory(BenchRequest(app, "POST", "{}/new/nodes".format(url), body), url, "nodes"), 201)
+    results.append(dict(scenario = "factory", depth = depth, fanout = 0,
+      **await measure(app, table, create, requests, concurrency, max_seconds)))
+
+  for fanout in fanouts:
+    docs, url = wide(fanout)
+    app, table = make_app(docs, config)
+    await start(app)
+    async def children(idx):
+      checked(await app.dispatcher(BenchRequest(app, "GET", "{}/get_children".format(url))), 200)
+    results.append(dict(scenario = "dispatcher/get_children", depth = 1, fanout = fanout,
+      **await measure(app, table, children, requests, concurrency, max_seconds)))
+
+  return results
+
+def commit():
+  try:
+    return check_output(["git", "rev-parse", "--short", "HEAD"], universal_newlines = True).strip()
+  except (CalledProcessError, OSError):
+    return None
+
+def run(depths, fanouts, config = None, requests = 200, concurrency = 1, max_seconds = 10):
+  loop = new_event_loop()
+  set_event_loop(loop)
+  try:
+    results = loop.run_until_complete(scenarios(depths, fanouts, config or {}, requests, concurrency, max_seconds))
+  finally:
+    loop.close()
+
+  return {"commit": commit(), "python": python_version(), "config": config or {}, "concurrency": concurrency, "results": results}
+
+def compare(report, previous):
+  """The rps ratio (new / previous) and p50 difference of the scenarios in both reports"""
+  before = {(row["scenario"], row["depth"], row["fanout"]): row for row in previous["results"]}
+  for row in report["results"]:
+    old = before.get((row["scenario"], row["depth"], row["fanout"]))
+    if old is not None:
+      yield row, row["rps"] / old["rps"], row["p50_ms"] - old["p50_ms"]
+
+def config_value(option):
+  key, _, value = option.partition("=")
+  try:
+    return key, loads(value)
+  except ValueError:
+    return key, value
+
+if __name__ == "__main__":
+  parser = ArgumentParser(description = "Dispatch and resolution benchmark against an in-memory table")
+  parser.add_argument("--depths", type = int, nargs = "+", default = [1, 5, 10, 20])
+  parser.add_argument("--fanouts", type = int, nargs = "+", default = [10, 100, 1000, 10000])
+  parser.add_argument("--requests", type = int, default = 200, help = "Requests by scenario")
+  parser.add_argument("--concurrency", type = int, default = 1, help = "Requests in flight at once")
+  parser.add_argument("--max-seconds", type = float, default = 10, help = "Stops a scenario after this time even if it didn't make all the requests")
+  parser.add_argument("--config", nargs = "*", default = [], type = config_value, help = "App config as KEY=VALUE (VALUE as JSON if it is)")
+  parser.add_argument("--output", help = "Saves the results as JSON in this file")
+  parser.add_argument("--compare", help = "Compares the results with the ones saved in this file")
+  args = parser.parse_args()
+
+  report = run(args.depths, args.fanouts, dict(args.config), args.requests, args.concurrency, args.max_seconds)
+  print("commit: {commit}, python: {python}, concurrency: {concurrency}, config: {config}".format(**report))
+  print("{:<24} {:>6} {:>7} {:>9} {:>10} {:>9} {:>9} {:>9} {:>8}".format("scenario", "depth", "fanout", "requests", "rps", "p50 ms", "p90 ms", "p99 ms", "queries"))
+  for row in report["results"]:
+    print("{scenario:<24} {depth:>6} {fanout:>7} {requests:>9} {rps:>10.1f} {p50_ms:>9.3f} {p90_ms:>9.3f} {p99_ms:>9.3f} {queries:>8.1f}".format(**row))
+
+  if args.compare:
+    with open(args.compare) as f:
+      previous = load(f)
+    print("\nagainst {}".format(previous.get("commit") or args.compare))
+    for row, ratio, p50 in compare(report, previous):
+      print("{:<24} {:>6} {:>7} {:>9.2f}x rps {:>+9.3f} ms p50".format(row["scenario"], row["depth"], row["fanout"], ratio, p50))
+
+  if args.output:
+    with open(args.output, "w") as f:
+      dump(report, f, indent = 2)
@@ -0,0 +1,342 @@
+"""
+An in-memory stand-in of a Motor collection with what ySanic and yModel's MongoTree use
+Documents are indexed by _id, (path, slug) and path so the benchmarks measure ySanic and not this table
+"""
+import re
+from asyncio import get_event_loop
+from collections import namedtuple
+
+from bson import ObjectId
+
+InsertOneResult = namedtuple("InsertOneResult", ["inserted_id"])
+UpdateResult = namedtuple("UpdateResult", ["matched_count", "modified_count"])
+DeleteResult = namedtuple("DeleteResult", ["deleted_count"])
+
+def _done(result):
+  # like Motor the operation is done when it's called, even if nobody awaits it (yModel's update doesn't)
+  future = get_event_loop().create_future()
+  future.set_result(result)
+  return future
+
+def _copy(doc):
+  return {key: list(value) if isinstance(value, list) else dict(value) if isinstance(value, dict) else value for key, value in doc.items()}
+
+def _match_value(value, condition):
+  if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+    for operator, argument in condition.items():
+      if operator == "$in":
+        if not (value in argument or (isinstance(value, list) and any(element in argument for element in value))):
+          return False
+      elif operator == "$nin":
+        if value in argument:
+          return False
+      elif operator == "$ne":
+        if value == argument:
+          return False
+      elif operator == "$regex":
+        if not isinstance(value, str) or not re.search(argument, value):
+          return False
+      elif operator == "$exists":
+        if (value is not None) != argument:
+          return False
+      elif operator == "$gt":
+        if value is None or not value > argument:
+          return False
+      elif operator == "$gte":
+        if value is None or not value >= argument:
+          return False
+      elif operator == "$lt":
+        if value is None or not value < argument:
+          return False
+      elif operator == "$lte":
+        if value is None or not value <= argument:
+          return False
+      else:
+        raise NotImplementedError(operator)
+    return True
+  elif hasattr(condition, "search"):
+    return isinstance(value, str) and condition.search(value) is not None
+  elif isinstance(value, list) and not isinstance(condition, list):
+    return condition in value
+
+  return value == condition
+
+def match(doc, query):
+  for key, condition in query.items():
+    if key == "$or":
+      if not any(match(doc, clause) for clause in condition):
+        return False
+    elif key == "$and":
+      if not all(match(doc, clause) for clause in condition):
+        return False
+    elif not _match_value(doc.get(key), condition):
+      return False
+
+  return True
+
+def _sort(docs, sort):
+  for key, direction in reversed(list(sort.items() if isinstance(sort, dict) else sort)):
+    docs.sort(key = lambda doc: (doc.get(key) is not None, doc.get(key)), reverse = direction < 0)
+  return docs
+
+def _evaluate(doc, expression):
+  # the aggregation expressions of the update pipelines ySanic uses
+  if isinstance(expression, str) and expression.startswith("$"):
+    return doc.get(expression[1:])
+  elif isinstance(expression, dict) and len(expression) == 1:
+    operator, arguments = next(iter(expression.items()))
+    if operator == "$concat":
+      return "".join(_evaluate(doc, argument) for argument in arguments)
+    elif operator == "$substrCP":
+      string, start, length = (_evaluate(doc, argument) for argument in arguments)
+      return string[start:start + length]
+    elif operator == "$strLenCP":
+      return len(_evaluate(doc, arguments))
+    raise NotImplementedError(operator)
+
+  return expression
+
+class FakeCursor:
+  def __init__(self, docs, plan = None):
+    self.docs = docs
+    self.plan = plan
+
+  async def explain(self):
+    return {"queryPlanner": {"winningPlan": self.plan or {"stage": "COLLSCAN"}}}
+
+  def sort(self, key, direction = 1):
+    _sort(self.docs, [(key, direction)] if isinstance(key, str) else key)
+    return self
+
+  def skip(self, number):
+    self.docs = self.docs[number:]
+    return self
+
+  def limit(self, number):
+    if number:
+      self.docs = self.docs[:number]
+    return self
+
+  async def to_list(self, length):
+    return self.docs if length is None else self.docs[:length]
+
+  def __aiter__(self):
+    self._iterator = iter(self.docs)
+    return self
+
+  async def __anext__(self):
+    try:
+      return next(self._iterator)
+    except StopIteration:
+      raise StopAsyncIteration
+
+class FakeSession:
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, *exc):
+    pass
+
+  def start_transaction(self, *args, **kwargs):
+    return self
+
+class FakeAdmin:
+  async def command(self, command, *args, **kwargs):
+    # a replica set, so ySanic runs its transactions (FakeSession)
+    return {"ismaster": True, "setName": "fake"} if command == "ismaster" else {"ok": 1}
+
+class FakeClient:
+  def __init__(self):
+    self.admin = FakeAdmin()
+
+  async def start_session(self, *args, **kwargs):
+    return FakeSession()
+
+class FakeDatabase:
+  def __init__(self):
+    self.client = FakeClient()
+
+class FakeTable:
+  def __init__(self, docs = None):
+    self.database = FakeDatabase()
+    self.name = "fake"
+    self.queries = 0
+    self._indexes = {"_id_": {"key": [("_id", 1)]}}
+    self._docs = {}
+    self._by_key = {}
+    self._by_path = {}
+    for doc in docs or []:
+      self._insert(doc)
+
+  def __len__(self):
+    return len(self._docs)
+
+  def with_options(self, **kwargs):
+    # one server so every read preference reads the same documents
+    return self
+
+  def create_index(self, keys, unique = False, **kwargs):
+    # only recorded, the lookups use the fixed indexes of the table
+    name = "_".join("{}_{}".format(key, direction) for key, direction in keys)
+    self._indexes[name] = dict({"key": list(keys)}, **({"unique": True} if unique else {}))
+    return _done(name)
+
+  def drop_index(self, name):
+    self._indexes.pop(name, None)
+    return _done(None)
+
+  def index_information(self):
+    return _done({name: dict(info) for name, info in self._indexes.items()})
+
+  def _insert(self, doc):
+    doc = _copy(doc)
+    if "_id" not in doc:
+      doc["_id"] = ObjectId()
+    self._docs[doc["_id"]] = doc
+    self._index(doc)
+    return doc["_id"]
+
+  def _index(self, doc):
+    self._by_key[(doc.get("path"), doc.get("slug"))] = doc["_id"]
+    self._by_path.setdefault(doc.get("path"), {})[doc["_id"]] = None
+
+  def _unindex(self, doc):
+    self._by_key.pop((doc.get("path"), doc.get("slug")), None)
+    self._by_path.get(doc.get("path"), {}).pop(doc["_id"], None)
+
+  def _candidates(self, query):
+    # the indexes ySanic's queries can use, the whole collection otherwise
+    if "_id" in query and not isinstance(query["_id"], dict):
+      return [self._docs[query["_id"]]] if query["_id"] in self._docs else []
+    elif isinstance(query.get("path"), str):
+      if isinstance(query.get("slug"), str):
+        _id = self._by_key.get((query["path"], query["slug"]))
+        return [self._docs[_id]] if _id is not None else []
+      return [self._docs[_id] for _id in self._by_path.get(query["path"], {})]
+    elif list(query) == ["$or"]:
+      docs = {}
+      for clause in query["$or"]:
+        for doc in self._candidates(clause):
+          docs[doc["_id"]] = doc
+      return list(docs.values())
+
+    return list(self._docs.values())
+
+  def _plan(self, query):
+    # the shape of the explain of a server with the same indexes as the table
+    if ("_id" in query and not isinstance(query["_id"], dict)) or isinstance(query.get("path"), str):
+      return {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}
+    elif list(query) == ["$or"] and all(self._plan(clause)["stage"] == "FETCH" for clause in query["$or"]):
+      return {"stage": "FETCH", "inputStage": {"stage": "OR", "inputStages": [self._plan(clause)["inputStage"] for clause in query["$or"]]}}
+
+    return {"stage": "COLLSCAN"}
+
+  def _find(self, query):
+    return [doc for doc in self._candidates(query or {}) if match(doc, query or {})]
+
+  def find_one(self, query = None, *args, **kwargs):
+    self.queries += 1
+    docs = self._find(query)
+    return _done(_copy(docs[0]) if docs else None)
+
+  def find(self, query = None, *args, **kwargs):
+    self.queries += 1
+    cursor = FakeCursor([_copy(doc) for doc in self._find(query)], self._plan(query or {}))
+    if kwargs.get("sort"):
+      cursor.sort(kwargs["sort"])
+    if kwargs.get("limit"):
+      cursor.limit(kwargs["limit"])
+    return cursor
+
+  def count_documents(self, query, *args, **kwargs):
+    self.queries += 1
+    return _done(len(self._find(query)))
+
+  def aggregate(self, pipeline, *args, **kwargs):
+    self.queries += 1
+    docs = None
+    for stage in pipeline:
+      if "$match" in stage:
+        docs = [doc for doc in (self._find(stage["$match"]) if docs is None else docs) if match(doc, stage["$match"])]
+        docs = [_copy(doc) for doc in docs]
+      elif docs is None:
+        docs = [_copy(doc) for doc in self._docs.values()]
+
+      if "$addFields" in stage:
+        for name, expression in stage["$addFields"].items():
+          array, field = expression["$indexOfArray"]
+          positions = {value: idx for idx, value in reversed(list(enumerate(array)))}
+          for doc in docs:
+            doc[name] = positions.get(doc.get(field.lstrip("$")), -1)
+      elif "$sort" in stage:
+        _sort(docs, stage["$sort"])
+      elif "$skip" in stage:
+        docs = docs[stage["$skip"]:]
+      elif "$limit" in stage:
+        docs = docs[:stage["$limit"]]
+      elif "$project" in stage:
+        pass
+      elif "$match" not in stage:
+        raise NotImplementedError(list(stage))
+
+    return FakeCursor(docs or [])
+
+  def insert_one(self, doc, *args, **kwargs):
+    self.queries += 1
+    return _done(InsertOneResult(self._insert(doc)))
+
+  def insert_many(self, docs, *args, **kwargs):
+    self.queries += 1
+    return _done([self._insert(doc) for doc in docs])
+
+  def _update(self, doc, update):
+    self._unindex(doc)
+    if isinstance(update, list):
+      for stage in update:
+        doc.update({key: _evaluate(doc, value) for key, value in stage["$set"].items()})
+      update = {}
+    for operator, fields in update.items():
+      for key, value in fields.items():
+        if operator == "$set":
+          doc[key] = value
+        elif operator == "$unset":
+          doc.pop(key, None)
+        elif operator == "$inc":
+          doc[key] = doc.get(key, 0) + value
+        elif operator == "$push":
+          doc.setdefault(key, []).extend(value["$each"] if isinstance(value, dict) and "$each" in value else [value])
+        elif operator == "$pull":
+          doc[key] = [element for element in doc.get(key, []) if not _match_value(element, value)]
+        else:
+          raise NotImplementedError(operator)
+    self._index(doc)
+
+  def update_one(self, query, update, *args, **kwargs):
+    self.queries += 1
+    docs = self._find(query)[:1]
+    for doc in docs:
+      self._update(doc, update)
+    return _done(UpdateResult(len(docs), len(docs)))
+
+  def update_many(self, query, update, *args, **kwargs):
+    self.queries += 1
+    docs = self._find(query)
+    for doc in docs:
+      self._update(doc, update)
+    return _done(UpdateResult(len(docs), len(docs)))
+
+  def delete_one(self, query, *args, **kwargs):
+    self.queries += 1
+    docs = self._find(query)[:1]
+    for doc in docs:
+      self._unindex(doc)
+      del self._docs[doc["_id"]]
+    return _done(DeleteResult(len(docs)))
+
+  def delete_many(self, query, *args, **kwargs):
+    self.queries += 1
+    docs = self._find(query)
+    for doc in docs:
+      self._unindex(doc)
+      del self._docs[doc["_id"]]
+    return _done(DeleteResult(len(docs)))
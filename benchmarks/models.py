@@ -0,0 +1,34 @@
+from marshmallow import fields
+
+from yModel import ErrorSchema, OkDictResult, OkListResult, consumes, produces
+from yModel.mongo import ObjectId, MongoTree
+
+class Node(MongoTree):
+  _id = ObjectId()
+  type_ = fields.Str(attribute = "type", missing = "Node")
+  name = fields.Str(required = True)
+  slug = fields.Str(required = True)
+  path = fields.Str(required = True)
+  nodes = fields.List(fields.Str, missing = [])
+
+  children_models = {"nodes": "Node"}
+  factories = {"nodes": "create_child"}
+
+  @produces(OkDictResult, as_ = "result")
+  @consumes("Node")
+  async def create_child(self, request, as_, model):
+    return await super().create_child(model, as_)
+
+  @produces(OkListResult, as_ = "result")
+  async def get_children(self, request):
+    result = await self.children("nodes", request.app.models)
+    return result.to_plain_dict()
+
+  @produces(OkDictResult, as_ = "result")
+  async def __call__(self, request):
+    return self.to_plain_dict()
+
+class Root(Node):
+  type_ = fields.Str(attribute = "type", missing = "Root")
+
+  auth = None
@@ -0,0 +1,56 @@
+"""
+Compares the default serialization of dispatcher/factory responses (to_plain_dict + response.json)
+with the fast one (JSON_SERIALIZER = "fast") on OkListResult payloads like the ones children() produces
+
+python -m benchmarks.serializers [--sizes 10 100 1000 10000] [--output results.json]
+"""
+from argparse import ArgumentParser
+from json import dump
+from timeit import Timer
+
+from bson import ObjectId
+
+from yModel import OkListResult
+
+from ySanic import MongoySanic, orjson
+from benchmarks import models
+
+def children_payload(size):
+  children = [{"_id": str(ObjectId()), "type": "Node", "name": "Child {}".format(i), "slug": "child-{}".format(i),
+    "path": "/parent", "nodes": []} for i in range(size)]
+  result = OkListResult()
+  result.load({"result": children})
+  return result
+
+def measure(app, serializer, result, repeat = 5):
+  app.config.JSON_SERIALIZER = serializer
+  timer = Timer(lambda: app._render(result, 200))
+  number, _ = timer.autorange()
+  return min(timer.repeat(repeat, number)) / number * 1000
+
+def run(sizes):
+  app = MongoySanic(models, name = "serializers_benchmark")
+  results = []
+  for size in sizes:
+    result = children_payload(size)
+    json_ms = measure(app, "json", result)
+    fast_ms = measure(app, "fast", result)
+    results.append({"children": size, "json_ms": json_ms, "fast_ms": fast_ms, "speedup": json_ms / fast_ms})
+
+  return {"backend": "orjson" if orjson is not None else "json", "results": results}
+
+if __name__ == "__main__":
+  parser = ArgumentParser(description = "Serialization benchmark of children lists")
+  parser.add_argument("--sizes", type = int, nargs = "+", default = [10, 100, 1000, 10000])
+  parser.add_argument("--output", help = "Saves the results as JSON in this file")
+  args = parser.parse_args()
+
+  report = run(args.sizes)
+  print("fast backend: {}".format(report["backend"]))
+  print("{:>10} {:>12} {:>12} {:>8}".format("children", "json (ms)", "fast (ms)", "speedup"))
+  for row in report["results"]:
+    print("{children:>10} {json_ms:>12.3f} {fast_ms:>12.3f} {speedup:>7.1f}x".format(**row))
+
+  if args.output:
+    with open(args.output, "w") as f:
+      dump(report, f, indent = 2)
@@ -1,5 +1,5 @@
-from pymongo import ASCENDING
-from sanic_mongo import Mongo, GridFS
+from sanic import response
+from sanic_mongo import GridFS
 
 from yModel.mongo import NotFound
 from ySanic import MongoySanic
@@ -11,20 +11,15 @@ class ySanicServer(MongoySanic):
   pass
 
 def create_app(config = None):
-  app = ySanicServer(models = models, name = "app")
+  app = ySanicServer(models = models, name = "app", subtree_routes = True, children_pages = ["Node.nodes"], batch = True)
   app.config.from_object(config or Config)
 
-  URI = app.config.get("MONGO_URI")
-  Mongo.SetConfig(app, test = URI)
-  Mongo(app)
-  GridFS.SetConfig(app, test_fs = (URI, "fs"))
+  GridFS.SetConfig(app, test_fs = (app.config.get("MONGO_URI"), "fs"))
   GridFS(app)
 
   @app.listener("before_server_start")
   async def setup_db(app, loop):
-    table = app.mongo["test"][app.config.get("MONGO_TABLE")]
-
-    await table.create_index([("path", ASCENDING), ("slug", ASCENDING)])
+    table = app.table
 
     root = app.models.Community(table)
     try:
@@ -39,7 +34,16 @@ def create_app(config = None):
 
       await root.update({"users": [admin._id]})
 
-  app.register_middleware(app.set_table, "request")
+  @app.route("/_files/<filename>")
+  async def download(request, filename):
+    return await app.file_response(request, filename)
+
+  @app.route("/_files/<filename>", methods = ["PUT"], stream = True)
+  async def upload(request, filename):
+    result = await app.set_file_stream(filename, request.stream, request.headers.get("Content-Type", "application/octet-stream"))
+    return response.json({"_id": str(result["_id"]), "sha256": result["sha256"], "length": result["length"], "duplicate": result["duplicate"]})
+
+  app.register_middleware(app.set_identity_map, "request")
 
   if app.config.get("DEBUG", False):
     app.register_middleware(app.allow_origin, "response")
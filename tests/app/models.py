@@ -41,7 +41,7 @@ class Node(MongoTree):
 
   @produces(OkListResult, as_ = "result")
   async def get_ancestors(self, request):
-    nodes = await self.ancestors(request.app.models)
+    nodes = await request.app.ancestors_of(self)
     return [node.to_plain_dict() for node in nodes]
 
   @produces(OkDictResult, as_ = "result")
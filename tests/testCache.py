@@ -0,0 +1,74 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from ySanic.cache import TTLCache
+
+class TestCache(TestCase):
+  def testHitAndMiss(self):
+    cache = TTLCache(10)
+    cache.set("a", {"name": "a"})
+
+    self.assertEqual(cache.get("a"), {"name": "a"})
+    self.assertIsNone(cache.get("b"))
+    self.assertEqual(cache.get("b", "default"), "default")
+    self.assertDictEqual({"size": 1, "max_size": 10, "ttl": None, "hits": 1, "misses": 2, "ratio": 1 / 3}, cache.stats())
+
+  def testCopies(self):
+    cache = TTLCache(10)
+    value = {"nodes": ["a"]}
+    cache.set("a", value)
+    value["nodes"].append("b")
+    cache.get("a")["nodes"].append("c")
+
+    self.assertEqual(cache.get("a"), {"nodes": ["a"]})
+
+  def testTTL(self):
+    cache = TTLCache(10, ttl = 5)
+    with patch("ySanic.cache.monotonic", return_value = 100):
+      cache.set("a", 1)
+    with patch("ySanic.cache.monotonic", return_value = 104):
+      self.assertEqual(cache.get("a"), 1)
+    with patch("ySanic.cache.monotonic", return_value = 105):
+      self.assertIsNone(cache.get("a"))
+
+    self.assertNotIn("a", cache)
+
+  def testEviction(self):
+    cache = TTLCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    self.assertIn("a", cache)
+    self.assertNotIn("b", cache)
+    self.assertIn("c", cache)
+    self.assertEqual(len(cache), 2)
+
+  def testInvalidation(self):
+    cache = TTLCache(10)
+    for key in (("/", "a"), ("/a", "b"), ("/a/b", "c"), ("/", "d")):
+      cache.set(key, key[1])
+
+    self.assertEqual(cache.pop(("/", "d")), "d")
+    self.assertIsNone(cache.pop(("/", "d")))
+    self.assertEqual(cache.evict(lambda key: key[0] == "/a" or key[0].startswith("/a/")), 2)
+    self.assertListEqual([("/", "a")], [key for key in (("/", "a"), ("/a", "b"), ("/a/b", "c"), ("/", "d")) if key in cache])
+
+    cache.clear()
+
+    self.assertEqual(len(cache), 0)
+
+  def testStaleSet(self):
+    cache = TTLCache(10)
+    # a read starts, a write evicts what it reads and then the read ends
+    version = cache.version
+    cache.pop(("/", "a"))
+    cache.set(("/", "a"), "stale", version)
+
+    self.assertNotIn(("/", "a"), cache)
+
+    version = cache.version
+    cache.set(("/", "a"), "fresh", version)
+
+    self.assertEqual(cache.get(("/", "a")), "fresh")
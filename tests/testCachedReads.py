@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+from pymongo import MongoClient
+
+from slugify import slugify
+
+from tests.app.app import create_app
+
+class TestCachedReads(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.app.config.CACHE_SIZE = 100
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    name = "Test Cache"
+    self.user = {"type": "User", "name": name, "email": "testcache@ysanic.net", "slug": slugify(name), "path": "/", "trees": []}
+    self.user["_id"] = self.table.insert_one(self.user).inserted_id
+    self.table.update_one({"type": "Community"}, {"$addToSet": {"users": self.user["_id"]}})
+
+    name = "Cached Tree"
+    self.node = {"type": "Node", "name": name, "path": "/{}".format(self.user["slug"]), "slug": slugify(name), "nodes": []}
+    self.node["_id"] = self.table.insert_one(self.node).inserted_id
+    self.table.update_one({"_id": self.user["_id"]}, {"$addToSet": {"trees": self.node["slug"]}})
+    self.url = "/{}/{}".format(self.user["slug"], self.node["slug"])
+
+  def tearDown(self):
+    self.table.delete_one({"_id": self.node["_id"]})
+    self.table.delete_one({"_id": self.user["_id"]})
+    self.table.update_one({"type": "Community"}, {"$pull": {"users": self.user["_id"]}})
+
+    self.client.close()
+
+  def testHit(self):
+    _, resp = self.app.test_client.get(self.url)
+    hits = self.app.cache_stats()["hits"]
+    _, again = self.app.test_client.get(self.url)
+
+    self.assertEqual(again.status, 200)
+    self.assertEqual(resp.json, again.json)
+    self.assertGreater(self.app.cache_stats()["hits"], hits)
+
+  def testInvalidateAfterPut(self):
+    self.app.test_client.get(self.url)
+
+    _, resp = self.app.test_client.put(self.url, json = {"name": "Cached Tree 2", "slug": self.node["slug"]})
+
+    self.assertEqual(resp.status, 200)
+
+    _, resp = self.app.test_client.get(self.url)
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.json["result"]["name"], "Cached Tree 2")
+
+  def testInvalidateAfterDelete(self):
+    self.app.test_client.get(self.url)
+
+    _, resp = self.app.test_client.delete(self.url)
+
+    self.assertEqual(resp.status, 200)
+
+    _, resp = self.app.test_client.get(self.url)
+
+    self.assertEqual(resp.status, 404)
+
+  def testDirectWrite(self):
+    self.app.test_client.get(self.url)
+    # a write that doesn't go through the generated routes isn't seen until it's invalidated (or the TTL expires)
+    self.table.update_one({"_id": self.node["_id"]}, {"$set": {"name": "Written Elsewhere"}})
+
+    _, resp = self.app.test_client.get(self.url)
+
+    self.assertEqual(resp.json["result"]["name"], self.node["name"])
+
+    self.app.invalidate(self.url)
+    _, resp = self.app.test_client.get(self.url)
+
+    self.assertEqual(resp.json["result"]["name"], "Written Elsewhere")
@@ -0,0 +1,96 @@
+from unittest import TestCase
+from json import loads
+
+from pymongo import MongoClient
+
+from slugify import slugify
+
+from ySanic import _cursor_start
+
+from tests.app.app import create_app
+
+class TestCursor(TestCase):
+  def testCursor(self):
+    order = ["a", "b", "c", "d"]
+
+    self.assertEqual(_cursor_start(order, "1:b"), 2)
+    self.assertEqual(_cursor_start(order, "b"), 2)
+    self.assertIsNone(_cursor_start(order, "x"))
+
+  def testRemoved(self):
+    self.assertEqual(_cursor_start(["a", "c", "d"], "1:b"), 1)
+    self.assertEqual(_cursor_start(["a"], "3:d"), 1)
+
+  def testMoved(self):
+    self.assertEqual(_cursor_start(["b", "c", "a"], "0:a"), 3)
+
+class TestChildrenPages(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    name = "Test Pages"
+    self.user = {"type": "User", "name": name, "email": "testpages@ysanic.net", "slug": slugify(name), "path": "/", "trees": []}
+    self.user["_id"] = self.table.insert_one(self.user).inserted_id
+    self.table.update_one({"type": "Community"}, {"$addToSet": {"users": self.user["_id"]}})
+
+    name = "Paged Tree"
+    self.slugs = ["child-{}".format(idx) for idx in range(5)]
+    self.node = {"type": "Node", "name": name, "path": "/{}".format(self.user["slug"]), "slug": slugify(name), "nodes": self.slugs}
+    self.node["_id"] = self.table.insert_one(self.node).inserted_id
+    self.table.update_one({"_id": self.user["_id"]}, {"$addToSet": {"trees": self.node["slug"]}})
+    self.url = "/{}/{}".format(self.user["slug"], self.node["slug"])
+    self.table.insert_many([{"type": "Node", "name": slug, "path": self.url, "slug": slug, "nodes": []} for slug in self.slugs])
+
+  def tearDown(self):
+    self.table.delete_many({"path": self.url})
+    self.table.delete_one({"_id": self.node["_id"]})
+    self.table.delete_one({"_id": self.user["_id"]})
+    self.table.update_one({"type": "Community"}, {"$pull": {"users": self.user["_id"]}})
+
+    self.client.close()
+
+  def page(self, query):
+    _, resp = self.app.test_client.get("{}/_children/nodes?{}".format(self.url, query))
+
+    self.assertEqual(resp.status, 200)
+    return resp.json
+
+  def testPages(self):
+    result = self.page("limit=2")
+
+    self.assertTrue(result["ok"])
+    self.assertListEqual(self.slugs[:2], [child["slug"] for child in result["result"]])
+    self.assertEqual("1:{}".format(self.slugs[1]), result["next"])
+
+    result = self.page("limit=2&after={}".format(result["next"]))
+
+    self.assertListEqual(self.slugs[2:4], [child["slug"] for child in result["result"]])
+
+    result = self.page("limit=2&after={}".format(result["next"]))
+
+    self.assertListEqual(self.slugs[4:], [child["slug"] for child in result["result"]])
+    self.assertIsNone(result["next"])
+
+  def testRemovedCursor(self):
+    result = self.page("limit=2")
+
+    _, resp = self.app.test_client.delete("{}/{}".format(self.url, self.slugs[1]))
+
+    self.assertEqual(resp.status, 200)
+
+    result = self.page("limit=2&after={}".format(result["next"]))
+
+    self.assertListEqual(self.slugs[2:4], [child["slug"] for child in result["result"]])
+
+  def testUnknownKey(self):
+    _, resp = self.app.test_client.get("{}/_children/nodes?after=missing".format(self.url))
+
+    self.assertEqual(resp.status, 400)
+
+  def testNdjson(self):
+    _, resp = self.app.test_client.get("{}/_children/nodes?format=ndjson&after={}".format(self.url, self.slugs[0]))
+
+    self.assertEqual(resp.status, 200)
+    self.assertListEqual(self.slugs[1:], [loads(line)["slug"] for line in resp.text.splitlines()])
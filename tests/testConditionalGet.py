@@ -0,0 +1,83 @@
+from unittest import TestCase
+
+from pymongo import MongoClient
+
+from slugify import slugify
+
+from tests.app.app import create_app
+
+class TestConditionalGet(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.app.config.ETAGS = True
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    name = "Test Conditional"
+    self.user = {"type": "User", "name": name, "email": "testconditional@ysanic.net", "slug": slugify(name), "path": "/", "trees": []}
+    self.user["_id"] = self.table.insert_one(self.user).inserted_id
+    self.table.update_one({"type": "Community"}, {"$addToSet": {"users": self.user["_id"]}})
+
+    name = "Conditional Tree"
+    self.node = {"type": "Node", "name": name, "path": "/{}".format(self.user["slug"]), "slug": slugify(name), "nodes": []}
+    self.node["_id"] = self.table.insert_one(self.node).inserted_id
+    self.table.update_one({"_id": self.user["_id"]}, {"$addToSet": {"trees": self.node["slug"]}})
+    self.url = "/{}/{}".format(self.user["slug"], self.node["slug"])
+
+  def tearDown(self):
+    self.table.delete_one({"_id": self.node["_id"]})
+    self.table.delete_one({"_id": self.user["_id"]})
+    self.table.update_one({"type": "Community"}, {"$pull": {"users": self.user["_id"]}})
+
+    self.client.close()
+
+  def etag(self):
+    _, resp = self.app.test_client.get(self.url)
+
+    self.assertEqual(resp.status, 200)
+    self.assertIn("ETag", resp.headers)
+    return resp.headers["ETag"]
+
+  def testNotModified(self):
+    etag = self.etag()
+
+    _, resp = self.app.test_client.get(self.url, headers = {"If-None-Match": etag})
+
+    self.assertEqual(resp.status, 304)
+
+  def testMember(self):
+    _, resp = self.app.test_client.get("{}/get_ancestors".format(self.url))
+    etag = resp.headers["ETag"]
+
+    _, resp = self.app.test_client.get("{}/get_ancestors".format(self.url), headers = {"If-None-Match": etag})
+
+    self.assertEqual(resp.status, 304)
+
+  def testVaryByUser(self):
+    etag = self.etag()
+
+    _, resp = self.app.test_client.get(self.url, headers = {"If-None-Match": etag, "Authorization": "Bearer other"})
+
+    self.assertEqual(resp.status, 200)
+    self.assertNotEqual(etag, resp.headers["ETag"])
+
+  def testWrite(self):
+    etag = self.etag()
+
+    _, resp = self.app.test_client.put(self.url, json = {"name": self.node["name"], "slug": self.node["slug"]})
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(1, self.table.find_one({"_id": self.node["_id"]})["_v"])
+
+    _, resp = self.app.test_client.get(self.url, headers = {"If-None-Match": etag})
+
+    self.assertEqual(resp.status, 200)
+    self.assertNotEqual(etag, resp.headers["ETag"])
+
+  def testDisabled(self):
+    self.app.config.ETAGS = False
+
+    _, resp = self.app.test_client.get(self.url)
+
+    self.assertEqual(resp.status, 200)
+    self.assertNotIn("ETag", resp.headers)
@@ -0,0 +1,148 @@
+from unittest import TestCase
+from hashlib import sha256
+
+from bson import ObjectId
+from pymongo import MongoClient
+from gridfs import GridFSBucket
+
+from tests.app.app import create_app
+
+class TestFiles(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.bucket = GridFSBucket(self.client.tests, "fs")
+
+    self.filename = "testFiles.txt"
+    self.content = bytes(range(100))
+    self.file_id = self.bucket.upload_from_stream(self.filename, self.content, metadata = {"contentType": "text/plain"})
+    self.url = "/_files/{}".format(self.filename)
+
+  def tearDown(self):
+    for file in self.bucket.find({"filename": self.filename}):
+      self.bucket.delete(file._id)
+
+    self.client.close()
+
+  def get(self, **headers):
+    _, resp = self.app.test_client.get(self.url, headers = headers)
+    return resp
+
+  def testWhole(self):
+    resp = self.get()
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.body, self.content)
+    self.assertEqual(resp.headers["ETag"], '"{}"'.format(self.file_id))
+    self.assertEqual(resp.headers["Accept-Ranges"], "bytes")
+    self.assertEqual(resp.headers["Content-Type"], "text/plain")
+
+  def testMissing(self):
+    _, resp = self.app.test_client.get("/_files/missing.txt")
+
+    self.assertEqual(resp.status, 404)
+
+  def testRange(self):
+    resp = self.get(Range = "bytes=10-19")
+
+    self.assertEqual(resp.status, 206)
+    self.assertEqual(resp.body, self.content[10:20])
+    self.assertEqual(resp.headers["Content-Range"], "bytes 10-19/100")
+
+  def testSuffixRange(self):
+    resp = self.get(Range = "bytes=-10")
+
+    self.assertEqual(resp.status, 206)
+    self.assertEqual(resp.body, self.content[90:])
+    self.assertEqual(resp.headers["Content-Range"], "bytes 90-99/100")
+
+  def testOpenEndedRange(self):
+    resp = self.get(Range = "bytes=95-")
+
+    self.assertEqual(resp.status, 206)
+    self.assertEqual(resp.body, self.content[95:])
+
+  def testUnsatisfiableRange(self):
+    resp = self.get(Range = "bytes=100-")
+
+    self.assertEqual(resp.status, 416)
+    self.assertEqual(resp.headers["Content-Range"], "bytes */100")
+
+  def testMultipleRanges(self):
+    resp = self.get(Range = "bytes=0-9,20-29")
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.body, self.content)
+
+  def testIfNoneMatch(self):
+    etag = self.get().headers["ETag"]
+    resp = self.get(**{"If-None-Match": etag})
+
+    self.assertEqual(resp.status, 304)
+    self.assertEqual(resp.body, b"")
+
+  def testIfRange(self):
+    etag = self.get().headers["ETag"]
+
+    resp = self.get(Range = "bytes=0-9", **{"If-Range": etag})
+
+    self.assertEqual(resp.status, 206)
+
+    resp = self.get(Range = "bytes=0-9", **{"If-Range": '"other"'})
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.body, self.content)
+
+  def testNewRevision(self):
+    etag = self.get().headers["ETag"]
+    self.bucket.upload_from_stream(self.filename, b"new content")
+
+    resp = self.get(**{"If-None-Match": etag})
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.body, b"new content")
+
+  def upload(self, data):
+    _, resp = self.app.test_client.put(self.url, data = data, headers = {"Content-Type": "text/plain"})
+
+    self.assertEqual(resp.status, 200)
+    return resp.json
+
+  def revisions(self):
+    return list(self.bucket.find({"filename": self.filename}, sort = [("uploadDate", 1)]))
+
+  def testUpload(self):
+    result = self.upload(b"uploaded content")
+
+    self.assertFalse(result["duplicate"])
+    self.assertEqual(result["sha256"], sha256(b"uploaded content").hexdigest())
+    self.assertEqual(result["length"], len(b"uploaded content"))
+    self.assertEqual(self.revisions()[-1]._id, ObjectId(result["_id"]))
+    self.assertEqual(self.get().body, b"uploaded content")
+
+  def testSameContent(self):
+    first = self.upload(b"same content")
+    again = self.upload(b"same content")
+
+    self.assertTrue(again["duplicate"])
+    self.assertEqual(again["_id"], first["_id"])
+    # the fixture and the first upload, the second one was discarded
+    self.assertEqual(len(self.revisions()), 2)
+
+  def testDifferentContent(self):
+    first = self.upload(b"first content")
+    second = self.upload(b"second content")
+
+    self.assertFalse(second["duplicate"])
+    self.assertNotEqual(second["_id"], first["_id"])
+    self.assertEqual(len(self.revisions()), 3)
+    self.assertEqual(self.get().body, b"second content")
+
+  def testPreviousContent(self):
+    # only the newest revision is compared so going back to an older content is a new revision
+    self.upload(b"first content")
+    self.upload(b"second content")
+    result = self.upload(b"first content")
+
+    self.assertFalse(result["duplicate"])
+    self.assertEqual(len(self.revisions()), 4)
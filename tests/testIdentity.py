@@ -0,0 +1,101 @@
+from unittest import TestCase
+from asyncio import run
+
+from bson import ObjectId
+
+from ySanic import MongoySanic
+from ySanic.identity import IdentityMap, current
+
+from benchmarks import models
+from benchmarks.dispatch import chain
+from benchmarks.fake import FakeTable
+
+class Paper:
+  def __init__(self, _id):
+    self._id = _id
+
+  def get_data(self):
+    return {"_id": self._id}
+
+class TestIdentityMap(TestCase):
+  def testAdd(self):
+    identities = IdentityMap()
+    paper = Paper(ObjectId())
+    identities.add(("/", "a"), paper)
+
+    self.assertIs(identities.get(("/", "a")), paper)
+    self.assertIs(identities.get_by_id(paper._id), paper)
+    self.assertIsNone(identities.get(("/", "b")))
+    self.assertEqual(len(identities), 1)
+
+  def testEvict(self):
+    identities = IdentityMap()
+    papers = {key: Paper(ObjectId()) for key in (("/", "a"), ("/a", "b"), ("/a/b", "c"), ("/", "d"))}
+    for key, paper in papers.items():
+      identities.add(key, paper)
+
+    self.assertEqual(identities.evict(lambda key: key[0].startswith("/a")), 2)
+    self.assertListEqual([("/", "a"), ("/", "d")], list(identities.by_key))
+    self.assertIsNone(identities.get_by_id(papers[("/a", "b")]._id))
+    self.assertIs(identities.get_by_id(papers[("/", "d")]._id), papers[("/", "d")])
+
+class CountingTable(FakeTable):
+  def __init__(self, docs):
+    super().__init__(docs)
+    self.queries = 0
+
+  def find_one(self, *args, **kwargs):
+    self.queries += 1
+    return super().find_one(*args, **kwargs)
+
+  def find(self, *args, **kwargs):
+    self.queries += 1
+    return super().find(*args, **kwargs)
+
+class TestIdentity(TestCase):
+  def setUp(self):
+    docs, self.url = chain(3)
+    self.table = CountingTable(docs)
+    self.app = MongoySanic(models, name = "identity", table = self.table)
+
+  def inRequest(self, coroutine):
+    async def request():
+      current.set(IdentityMap())
+      return await coroutine()
+
+    return run(request())
+
+  def testDedupe(self):
+    async def loads():
+      first = await self.app.get_paper(self.url)
+      queries = self.table.queries
+      again = await self.app.get_paper(self.url)
+      by_id = await self.app.get_paper_by_id(first._id)
+      resolved = await self.app.resolve_path(self.url)
+      papers = await self.app.get_papers([self.url])
+      return first, [again, by_id, resolved["model"], papers[0]], self.table.queries - queries
+
+    first, others, queries = self.inRequest(loads)
+
+    for other in others:
+      self.assertIs(other, first)
+    # nothing is asked again
+    self.assertEqual(queries, 0)
+
+  def testRequests(self):
+    async def load():
+      return await self.app.get_paper(self.url)
+
+    # every request has its own models
+    self.assertIsNot(self.inRequest(load), self.inRequest(load))
+
+  def testInvalidate(self):
+    async def loads():
+      first = await self.app.get_paper(self.url)
+      self.app.invalidate(self.url)
+      return first, await self.app.get_paper(self.url)
+
+    first, again = self.inRequest(loads)
+
+    self.assertIsNot(again, first)
+    self.assertEqual(again._id, first._id)
@@ -0,0 +1,39 @@
+from unittest import TestCase
+
+from pymongo import MongoClient
+
+from ySanic import indexes
+
+from tests.app.app import create_app
+
+class TestModelIndexes(TestCase):
+  def testPaths(self):
+    keys = (("path", 1), ("slug", 1))
+
+    self.assertIn(indexes.Index(keys, False, "the paths of the trees"), indexes.model_indexes({"trees": []}))
+    self.assertIn(indexes.Index(keys, True, "the paths of the trees"), indexes.model_indexes({"trees": []}, unique_paths = True))
+
+  def testUncovered(self):
+    shapes = indexes.query_shapes({"trees": []})
+    information = {"_id_": {"key": [("_id", 1)]}, "path_1_slug_1": {"key": [("path", 1), ("slug", 1)]}}
+
+    self.assertListEqual([], indexes.uncovered(shapes, information))
+    self.assertListEqual(list(shapes), indexes.uncovered(shapes, {"_id_": {"key": [("_id", 1)]}}))
+
+class TestIndexes(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    self.app.test_client.get("/")
+
+  def tearDown(self):
+    self.client.close()
+
+  def testIndexes(self):
+    keys = {tuple(info["key"]): info.get("unique", False) for info in self.table.index_information().values()}
+
+    self.assertIn((("path", 1), ("slug", 1)), keys)
+    self.assertIn((("email", 1),), keys)
+    self.assertIn((("filename", 1), ("uploadDate", -1)), [tuple(info["key"]) for info in self.client.tests.fs.files.index_information().values()])
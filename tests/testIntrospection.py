@@ -0,0 +1,90 @@
+from unittest import TestCase
+from unittest.mock import patch
+from importlib import import_module
+from os import chmod, path as os_path
+from tempfile import TemporaryDirectory
+import sys
+
+from ySanic import ySanic, introspection
+
+from tests.app import models
+
+MODELS = """
+from yModel import Schema
+
+class Thing(Schema):
+  pass
+"""
+
+class TestIntrospection(TestCase):
+  def setUp(self):
+    self.directory = TemporaryDirectory()
+    self.filename = os_path.join(self.directory.name, "introspection.pickle")
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def endpoints(self, app):
+    return {entry: (endpoint.method, endpoint.name, endpoint.coroutine, endpoint.factory, endpoint.operation) for entry, endpoint in app._dispatch.items()}
+
+  def testRoundTrip(self):
+    app = ySanic(models = models, name = "introspected", introspection_cache = self.filename)
+
+    self.assertTrue(os_path.isfile(self.filename))
+    self.assertEqual(introspection.stat(self.filename).st_mode & 0o777, 0o600)
+
+    with patch.object(ySanic, "_checks", side_effect = AssertionError("the snapshot wasn't used")):
+      loaded = ySanic(models = models, name = "loaded", introspection_cache = self.filename)
+
+    self.assertEqual(app._checkings, loaded._checkings)
+    self.assertEqual(app._permissions, loaded._permissions)
+    self.assertEqual(app._members, loaded._members)
+    self.assertEqual(self.endpoints(app), self.endpoints(loaded))
+    self.assertEqual(set(app.router.routes_all), set(loaded.router.routes_all))
+
+  def testSourceKey(self):
+    source = os_path.join(self.directory.name, "snapshot_models.py")
+    with open(source, "w") as f:
+      f.write(MODELS)
+    sys.path.insert(0, self.directory.name)
+    try:
+      module = import_module("snapshot_models")
+      key = introspection.source_key(module, ySanic)
+
+      self.assertEqual(key, introspection.source_key(module, ySanic))
+
+      with open(source, "a") as f:
+        f.write("\n# changed\n")
+
+      self.assertNotEqual(key, introspection.source_key(module, ySanic))
+    finally:
+      sys.path.remove(self.directory.name)
+      sys.modules.pop("snapshot_models", None)
+
+  def testKeyMismatch(self):
+    introspection.dump(self.filename, "key", {"root": None, "dispatch": {}, "members": {}}, None)
+
+    self.assertIsNone(introspection.load(self.filename, "another key", None))
+    self.assertEqual(introspection.load(self.filename, "key", None)["root"], None)
+
+  def testWritable(self):
+    introspection.dump(self.filename, "key", {"root": "Community", "dispatch": {}, "members": {}}, None)
+
+    self.assertEqual(introspection.load(self.filename, "key", None)["root"], "Community")
+
+    for mode in (0o620, 0o602, 0o666):
+      chmod(self.filename, mode)
+
+      self.assertIsNone(introspection.load(self.filename, "key", None))
+
+    chmod(self.filename, 0o644)
+
+    self.assertEqual(introspection.load(self.filename, "key", None)["root"], "Community")
+
+  def testBroken(self):
+    with open(self.filename, "wb") as f:
+      f.write(b"not a pickle")
+    chmod(self.filename, 0o600)
+
+    self.assertIsNone(introspection.load(self.filename, "key", None))
+    self.assertIsNone(introspection.load(os_path.join(self.directory.name, "missing"), "key", None))
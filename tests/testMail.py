@@ -0,0 +1,162 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import patch
+from email.mime.text import MIMEText
+from logging import getLogger
+from smtplib import SMTPServerDisconnected
+from threading import get_ident
+
+from ySanic.mail import Mailer
+
+# the mailer's sleep is patched to record the backoff without waiting
+sleep = asyncio.sleep
+
+class FakeSMTP:
+  def __init__(self, failures):
+    self.failures = failures
+    self.sent = []
+    self.closed_from = None
+
+  def sendmail(self, sender, to, msg):
+    # every address in failures fails once
+    if to in self.failures:
+      self.failures.remove(to)
+      raise SMTPServerDisconnected("try again")
+    self.sent.append(to)
+
+  def quit(self):
+    self.closed_from = get_ident()
+
+  def close(self):
+    self.closed_from = get_ident()
+
+def message(subject):
+  msg = MIMEText("<p>{}</p>".format(subject), "html")
+  msg["Subject"] = subject
+  return msg
+
+class TestMail(TestCase):
+  def setUp(self):
+    self.config = {"SMTP_SENDER": "ysanic@ysanic.net", "MAIL_BACKOFF": 1, "MAIL_RETRIES": 2, "MAIL_BATCH": 10, "MAIL_IDLE_TIMEOUT": 30}
+    self.servers = []
+    self.failures = []
+    self.sleeps = []
+
+  def connect(self):
+    server = FakeSMTP(self.failures)
+    self.servers.append(server)
+    return server
+
+  async def sleep(self, delay):
+    self.sleeps.append(delay)
+    await sleep(0)
+
+  def run(self, result = None):
+    with patch.object(Mailer, "connect", lambda mailer: self.connect()), patch("ySanic.mail.asyncio.sleep", self.sleep):
+      return super().run(result)
+
+  def sent(self):
+    return [to for server in self.servers for to in server.sent]
+
+  def testQueue(self):
+    async def main():
+      mailer = Mailer(self.config, getLogger("mail"))
+      mailer.start()
+      deliveries = [mailer.send("user{}@ysanic.net".format(i), message(str(i))) for i in range(3)]
+      deliveries.append(await mailer.put("user3@ysanic.net", message("3")))
+      await asyncio.gather(*deliveries)
+      await mailer.stop()
+
+    asyncio.run(main())
+
+    self.assertListEqual(["user{}@ysanic.net".format(i) for i in range(4)], self.sent())
+    # the batch shares the connection
+    self.assertEqual(len(self.servers), 1)
+
+  def testFull(self):
+    async def main():
+      mailer = Mailer(dict(self.config, MAIL_QUEUE_SIZE = 1), getLogger("mail"))
+      mailer.send("user@ysanic.net", message("first"))
+      with self.assertRaises(asyncio.QueueFull):
+        mailer.send("user@ysanic.net", message("second"))
+
+    asyncio.run(main())
+
+  def testRetry(self):
+    self.failures.extend(["user@ysanic.net"] * 2)
+
+    async def main():
+      mailer = Mailer(self.config, getLogger("mail"))
+      mailer.start()
+      await mailer.send("user@ysanic.net", message("retried"))
+      await mailer.stop()
+
+    asyncio.run(main())
+
+    self.assertListEqual(["user@ysanic.net"], self.sent())
+    self.assertListEqual([1, 2], self.sleeps)
+    # a new connection for every attempt
+    self.assertEqual(len(self.servers), 3)
+
+  def testFailure(self):
+    self.failures.extend(["user@ysanic.net"] * 3)
+
+    async def main():
+      mailer = Mailer(self.config, getLogger("mail"))
+      mailer.start()
+      failed = mailer.send("user@ysanic.net", message("failed"))
+      sent = mailer.send("other@ysanic.net", message("sent"))
+      with self.assertLogs("mail", "ERROR"), self.assertRaises(SMTPServerDisconnected):
+        await failed
+      await sent
+      await mailer.stop()
+
+    asyncio.run(main())
+
+    self.assertListEqual(["other@ysanic.net"], self.sent())
+
+  def testShutdown(self):
+    async def main():
+      mailer = Mailer(self.config, getLogger("mail"))
+      mailer.start()
+      await mailer.send("user@ysanic.net", message("sent"))
+      await mailer.stop()
+      return get_ident()
+
+    loop_thread = asyncio.run(main())
+
+    self.assertListEqual(["user@ysanic.net"], self.sent())
+    # the connection is closed when the worker is cancelled, out of the loop
+    self.assertIsNotNone(self.servers[0].closed_from)
+    self.assertNotEqual(self.servers[0].closed_from, loop_thread)
+
+  def testShutdownTimeout(self):
+    async def main():
+      mailer = Mailer(self.config, getLogger("mail"))
+      # without workers nothing is sent and the queue is dropped when the time is up
+      delivery = mailer.send("user@ysanic.net", message("never"))
+      with self.assertLogs("mail", "WARNING"):
+        await mailer.stop(0.01)
+      return delivery
+
+    delivery = asyncio.run(main())
+
+    self.assertTrue(delivery.cancelled())
+    self.assertListEqual([], self.sent())
+
+  def testIdle(self):
+    async def main():
+      mailer = Mailer(dict(self.config, MAIL_IDLE_TIMEOUT = 0.01), getLogger("mail"))
+      mailer.start()
+      await mailer.send("user@ysanic.net", message("first"))
+      await asyncio.wait_for(self.closed(), 1)
+      await mailer.send("user@ysanic.net", message("second"))
+      await mailer.stop()
+
+    asyncio.run(main())
+
+    self.assertEqual(len(self.servers), 2)
+
+  async def closed(self):
+    while self.servers[0].closed_from is None:
+      await sleep(0.001)
@@ -0,0 +1,104 @@
+from unittest import TestCase
+
+from pymongo import MongoClient
+
+from slugify import slugify
+
+from ySanic.metrics import Histogram, Metrics
+
+from tests.app.app import create_app
+
+def samples(text):
+  return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+class TestHistogram(TestCase):
+  def testCumulativeBuckets(self):
+    histogram = Histogram((1, 5, 10))
+    for value in (0.5, 1, 3, 7, 20):
+      histogram.observe(value)
+
+    self.assertListEqual(histogram.counts, [2, 3, 4])
+    self.assertListEqual(list(histogram.lines("latency", operation = "Node/call")), [
+      'latency_bucket{le="1",operation="Node/call"} 2',
+      'latency_bucket{le="5",operation="Node/call"} 3',
+      'latency_bucket{le="10",operation="Node/call"} 4',
+      'latency_bucket{le="+Inf",operation="Node/call"} 5',
+      'latency_sum{operation="Node/call"} 31.5',
+      'latency_count{operation="Node/call"} 5'
+    ])
+
+  def testRender(self):
+    metrics = Metrics()
+    metrics.observe_request("Node/call", "GET", 200, 0.003, 2)
+    metrics.observe_request("Node/call", "GET", 200, 0.2, 12)
+    metrics.observe_request("Node/call", "GET", 404, 0.001, 1)
+    metrics.observe_resolution(True)
+    metrics.observe_resolution(False)
+
+    result = samples(metrics.render({"ysanic_cache_size": ("Documents in the cache", 3)}))
+
+    self.assertEqual(result['ysanic_requests_total{operation="Node/call",method="GET",status="200"}'], "2")
+    self.assertEqual(result['ysanic_requests_total{operation="Node/call",method="GET",status="404"}'], "1")
+    self.assertEqual(result['ysanic_request_duration_seconds_bucket{le="0.001",operation="Node/call"}'], "1")
+    self.assertEqual(result['ysanic_request_duration_seconds_bucket{le="0.005",operation="Node/call"}'], "2")
+    self.assertEqual(result['ysanic_request_duration_seconds_bucket{le="0.25",operation="Node/call"}'], "3")
+    self.assertEqual(result['ysanic_request_duration_seconds_bucket{le="+Inf",operation="Node/call"}'], "3")
+    self.assertEqual(result['ysanic_mongo_queries_bucket{le="2",operation="Node/call"}'], "2")
+    self.assertEqual(result['ysanic_mongo_queries_bucket{le="20",operation="Node/call"}'], "3")
+    self.assertEqual(result['ysanic_resolutions_total{result="found"}'], "1")
+    self.assertEqual(result['ysanic_resolutions_total{result="not_found"}'], "1")
+    self.assertEqual(result["ysanic_cache_size"], "3")
+
+  def testEscape(self):
+    metrics = Metrics()
+    metrics.observe_request('a "quoted"\\path\n', "GET", 200, 0.1, 0)
+
+    self.assertIn('operation="a \\"quoted\\"\\\\path\\n"', metrics.render())
+
+class TestMetricsEndpoint(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.app.config.METRICS = True
+    self.app._metrics_endpoints()
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    name = "Test Metrics"
+    self.user = {"type": "User", "name": name, "email": "testmetrics@ysanic.net", "slug": slugify(name), "path": "/", "trees": []}
+    self.user["_id"] = self.table.insert_one(self.user).inserted_id
+    self.table.update_one({"type": "Community"}, {"$addToSet": {"users": self.user["_id"]}})
+
+  def tearDown(self):
+    self.table.delete_one({"_id": self.user["_id"]})
+    self.table.update_one({"type": "Community"}, {"$pull": {"users": self.user["_id"]}})
+
+    self.client.close()
+
+  def testEndpoint(self):
+    for _ in range(2):
+      self.app.test_client.get("/{}".format(self.user["slug"]))
+    self.app.test_client.get("/missing-user")
+
+    _, resp = self.app.test_client.get("/_metrics")
+
+    self.assertEqual(resp.status, 200)
+    self.assertTrue(resp.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+    result = samples(resp.text)
+
+    self.assertEqual(result['ysanic_requests_total{operation="User/call",method="GET",status="200"}'], "2")
+    self.assertEqual(result['ysanic_request_duration_seconds_count{operation="User/call"}'], "2")
+    self.assertEqual(result['ysanic_request_duration_seconds_bucket{le="+Inf",operation="User/call"}'], "2")
+    self.assertEqual(result['ysanic_resolutions_total{result="not_found"}'], "1")
+
+    buckets = [int(value) for name, value in result.items() if name.startswith("ysanic_request_duration_seconds_bucket") and 'operation="User/call"' in name]
+
+    self.assertListEqual(buckets, sorted(buckets))
+
+  def testDisabled(self):
+    app = create_app()
+    app._metrics_endpoints()
+
+    _, resp = app.test_client.get("/_metrics")
+
+    self.assertEqual(resp.status, 404)
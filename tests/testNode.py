@@ -317,3 +317,65 @@ class TestNode(TestCase):
     self.table.delete_one({"_id": ObjectId(resp.json["result"]["_id"])})
     self.table.delete_one({"_id": tree["_id"]})
     self.table.update_one({"_id": self.user["_id"]}, {"$pull": {"trees": tree["slug"]}})
+
+  def testRemoveSubtree(self):
+    user = self.user["slug"]
+    data = [
+      {"type": "Node", "name": "Removed tree", "path": "/{}".format(user), "slug": "removed-tree", "nodes": ["removed-node"]},
+      {"type": "Node", "name": "Removed node", "path": "/{}/removed-tree".format(user), "slug": "removed-node", "nodes": ["removed-leaf"]},
+      {"type": "Node", "name": "Removed leaf", "path": "/{}/removed-tree/removed-node".format(user), "slug": "removed-leaf", "nodes": []},
+      {"type": "Node", "name": "Kept tree", "path": "/{}".format(user), "slug": "removed-tree-kept", "nodes": []}
+    ]
+    self.table.insert_many(data)
+    self.table.update_one({"_id": self.user["_id"]}, {"$addToSet": {"trees": {"$each": ["removed-tree", "removed-tree-kept"]}}})
+
+    _, resp = self.app.test_client.delete("/{}/removed-tree/_subtree".format(user))
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.json["result"]["removed"], 3)
+    self.assertEqual(0, self.table.count_documents({"_id": {"$in": [doc["_id"] for doc in data[:3]]}}))
+    self.assertIsNotNone(self.table.find_one({"_id": data[3]["_id"]}))
+    self.assertNotIn("removed-tree", self.table.find_one({"_id": self.user["_id"]})["trees"])
+
+    self.table.delete_one({"_id": data[3]["_id"]})
+    self.table.update_one({"_id": self.user["_id"]}, {"$pull": {"trees": "removed-tree-kept"}})
+
+  def testMoveSubtree(self):
+    user = self.user["slug"]
+    data = [
+      {"type": "Node", "name": "Moved tree", "path": "/{}".format(user), "slug": "moved-tree", "nodes": ["moved-leaf"]},
+      {"type": "Node", "name": "Moved leaf", "path": "/{}/moved-tree".format(user), "slug": "moved-leaf", "nodes": []},
+      {"type": "Node", "name": "Target tree", "path": "/{}".format(user), "slug": "target-tree", "nodes": []}
+    ]
+    self.table.insert_many(data)
+    self.table.update_one({"_id": self.user["_id"]}, {"$addToSet": {"trees": {"$each": ["moved-tree", "target-tree"]}}})
+    url = "/{}/moved-tree/_move".format(user)
+
+    _, resp = self.app.test_client.put(url, json = {"to": "/{}/moved-tree/moved-leaf".format(user)})
+
+    self.assertEqual(resp.status, 400)
+
+    _, resp = self.app.test_client.put(url, json = {"to": "/{}".format(user), "slug": "target-tree"})
+
+    self.assertEqual(resp.status, 409)
+
+    _, resp = self.app.test_client.put(url, json = {"to": "/{}/target-tree".format(user), "slug": "a/b"})
+
+    self.assertEqual(resp.status, 400)
+    self.assertEqual(self.table.find_one({"_id": data[1]["_id"]})["path"], "/{}/moved-tree".format(user))
+
+    _, resp = self.app.test_client.put(url, json = {"to": "/{}/target-tree".format(user), "slug": "Moved"})
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.json["result"], {"url": "/{}/target-tree/moved".format(user), "moved": 2})
+    self.assertEqual(self.table.find_one({"_id": data[0]["_id"]})["path"], "/{}/target-tree".format(user))
+    self.assertEqual(self.table.find_one({"_id": data[1]["_id"]})["path"], "/{}/target-tree/moved".format(user))
+    self.assertEqual(self.table.find_one({"_id": data[2]["_id"]})["nodes"], ["moved"])
+    self.assertNotIn("moved-tree", self.table.find_one({"_id": self.user["_id"]})["trees"])
+
+    _, resp = self.app.test_client.get("/{}/target-tree/moved/moved-leaf".format(user))
+
+    self.assertEqual(resp.status, 200)
+
+    self.table.delete_many({"_id": {"$in": [doc["_id"] for doc in data]}})
+    self.table.update_one({"_id": self.user["_id"]}, {"$pull": {"trees": "target-tree"}})
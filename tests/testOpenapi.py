@@ -0,0 +1,78 @@
+from unittest import TestCase
+from gzip import decompress
+from json import loads
+
+from ySanic.openapi import Document, build_document
+
+from tests.app.app import create_app
+
+class TestDocument(TestCase):
+  def testEncoding(self):
+    document = Document({"openapi": "3.0.0", "paths": {"/": {"get": {"responses": {"200": {"description": ""}}}}}})
+
+    self.assertEqual(decompress(document.gzip), document.body)
+    self.assertEqual(loads(document.body)["openapi"], "3.0.0")
+    self.assertNotEqual(document.etag, document.gzip_etag)
+    self.assertEqual(document.etag, Document(loads(document.body)).etag)
+
+  def testResponses(self):
+    routes = {"/": {"get": {"responses": {200: {"description": None}, 404: {"description": "Not found"}}}}}
+    checkings = {"root": ("Root", None, {"routes": routes}), "trees": []}
+
+    document = build_document(checkings, "app", "1.0.0")
+
+    self.assertEqual(document["info"], {"title": "app", "version": "1.0.0"})
+    self.assertEqual(document["paths"]["/"]["get"]["responses"], {"200": {"description": ""}, "404": {"description": "Not found"}})
+    # the introspection isn't changed
+    self.assertIsNone(routes["/"]["get"]["responses"][200]["description"])
+
+class TestOpenapi(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.app._openapi_endpoints()
+
+  def testDocument(self):
+    _, resp = self.app.test_client.get("/openapi.json")
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.headers["Content-Type"], "application/json")
+    self.assertEqual(resp.headers["Vary"], "Accept-Encoding")
+    self.assertNotIn("Content-Encoding", resp.headers)
+
+    document = loads(resp.body)
+
+    self.assertTrue(document["openapi"].startswith("3."))
+    self.assertIn("/", document["paths"])
+    for operations in document["paths"].values():
+      for operation in operations.values():
+        for response in operation.get("responses", {}).values() if isinstance(operation, dict) else ():
+          self.assertIsInstance(response["description"], str)
+
+  def testGzip(self):
+    _, plain = self.app.test_client.get("/openapi.json")
+    _, resp = self.app.test_client.get("/openapi.json", headers = {"Accept-Encoding": "gzip, deflate"})
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+    self.assertNotEqual(resp.headers["ETag"], plain.headers["ETag"])
+    # the test client decompresses the body
+    self.assertEqual(resp.body, plain.body)
+
+  def testNotModified(self):
+    _, resp = self.app.test_client.get("/openapi.json")
+    etag = resp.headers["ETag"]
+
+    _, resp = self.app.test_client.get("/openapi.json", headers = {"If-None-Match": etag})
+
+    self.assertEqual(resp.status, 304)
+    self.assertEqual(resp.body, b"")
+    self.assertEqual(resp.headers["ETag"], etag)
+
+    _, resp = self.app.test_client.get("/openapi.json", headers = {"If-None-Match": '"other", {}'.format(etag)})
+
+    self.assertEqual(resp.status, 304)
+
+    # the ETag of the plain document doesn't validate the gzipped one
+    _, resp = self.app.test_client.get("/openapi.json", headers = {"If-None-Match": etag, "Accept-Encoding": "gzip"})
+
+    self.assertEqual(resp.status, 200)
@@ -0,0 +1,89 @@
+from unittest import TestCase
+from warnings import catch_warnings, simplefilter
+
+from pymongo import MongoClient
+
+from slugify import slugify
+
+from ySanic import CORS_HEADERS
+
+from tests.app.app import create_app
+from tests.app.config import Config
+
+class NoCorsConfig(Config):
+  DEBUG = False
+
+class TestPreflight(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    name = "Test Preflight"
+    self.user = {"type": "User", "name": name, "email": "testpreflight@ysanic.net", "slug": slugify(name), "path": "/", "trees": []}
+    self.user["_id"] = self.table.insert_one(self.user).inserted_id
+    self.table.update_one({"type": "Community"}, {"$addToSet": {"users": self.user["_id"]}})
+    self.url = "/{}".format(self.user["slug"])
+
+  def tearDown(self):
+    self.table.delete_one({"_id": self.user["_id"]})
+    self.table.update_one({"type": "Community"}, {"$pull": {"users": self.user["_id"]}})
+
+    self.client.close()
+
+  def assertCors(self, resp):
+    for header, value in CORS_HEADERS.items():
+      self.assertEqual(resp.headers[header], value)
+
+  def testMemberRoute(self):
+    _, resp = self.app.test_client.options("{}/get_trees".format(self.url))
+
+    self.assertEqual(resp.status, 204)
+    self.assertListEqual(["DELETE", "GET", "OPTIONS", "PUT"], resp.headers["Allow"].split(", "))
+    self.assertCors(resp)
+
+  def testFactoryRoute(self):
+    _, resp = self.app.test_client.options("{}/new/Node".format(self.url))
+
+    self.assertEqual(resp.status, 204)
+    self.assertIn("POST", resp.headers["Allow"].split(", "))
+    self.assertCors(resp)
+
+  def testUnknownPath(self):
+    # the dispatcher takes any path so an unknown one gets its methods and the 404 comes with the actual request
+    _, resp = self.app.test_client.options("/unknown/path")
+
+    self.assertEqual(resp.status, 204)
+    self.assertListEqual(["DELETE", "GET", "OPTIONS", "PUT"], resp.headers["Allow"].split(", "))
+    self.assertCors(resp)
+
+    _, resp = self.app.test_client.get("/unknown/path")
+
+    self.assertEqual(resp.status, 404)
+
+  def testAddedRoute(self):
+    _, resp = self.app.test_client.options("/_files/file.txt")
+
+    self.assertEqual(resp.status, 204)
+    self.assertIn("GET", resp.headers["Allow"].split(", "))
+
+  def testWithoutAllowOrigin(self):
+    app = create_app(NoCorsConfig)
+
+    _, resp = app.test_client.options("{}/get_trees".format(self.url))
+
+    self.assertEqual(resp.status, 204)
+    self.assertIn("Allow", resp.headers)
+    self.assertNotIn("Access-Control-Allow-Origin", resp.headers)
+
+  def testGenericOptions(self):
+    self.app.add_route(self.app.generic_options, "/_legacy", methods = ["OPTIONS"])
+    self.app.add_route(self.app.generic_options, "/_legacy", methods = ["GET"], name = "legacy_get")
+
+    with catch_warnings(record = True) as warnings:
+      simplefilter("always")
+      _, resp = self.app.test_client.options("/_legacy")
+
+    self.assertEqual(resp.status, 204)
+    self.assertIn("GET", resp.headers["Allow"].split(", "))
+    self.assertTrue(any(issubclass(warning.category, DeprecationWarning) for warning in warnings))
@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+from pymongo import MongoClient
+
+from slugify import slugify
+
+from ySanic.profiler import Profile, stages
+
+from tests.app.app import create_app
+
+class TestProfiler(TestCase):
+  def testProfile(self):
+    profile = Profile("server-id", "GET", "/a", "client-id")
+    profile.add("find_one", {"path": "/", "slug": "a"}, 0.002, 1)
+    profile.add("find", {"path": "/a"}, 0.003, 10)["collscan"] = True
+
+    result = profile.to_dict()
+
+    self.assertEqual(result["request_id"], "server-id")
+    self.assertEqual(result["client_id"], "client-id")
+    self.assertEqual(result["round_trips"], 2)
+    self.assertAlmostEqual(result["ms"], 5)
+    self.assertEqual(result["collscans"], 1)
+
+  def testStages(self):
+    plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}
+
+    self.assertListEqual(["FETCH", "IXSCAN"], list(stages(plan)))
+
+class TestProfile(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.app.config.PROFILE = True
+    self.app._debug_endpoints()
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    name = "Test Profile"
+    self.user = {"type": "User", "name": name, "email": "testprofile@ysanic.net", "slug": slugify(name), "path": "/", "trees": []}
+    self.user["_id"] = self.table.insert_one(self.user).inserted_id
+    self.table.update_one({"type": "Community"}, {"$addToSet": {"users": self.user["_id"]}})
+    self.url = "/{}".format(self.user["slug"])
+
+  def tearDown(self):
+    self.table.delete_one({"_id": self.user["_id"]})
+    self.table.update_one({"type": "Community"}, {"$pull": {"users": self.user["_id"]}})
+
+    self.client.close()
+
+  def testProfile(self):
+    _, resp = self.app.test_client.get(self.url)
+
+    self.assertEqual(resp.status, 200)
+
+    _, resp = self.app.test_client.get("/_profile/{}".format(resp.headers["X-Request-Id"]))
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.json["url"], self.url)
+    self.assertIsNone(resp.json["client_id"])
+    self.assertGreaterEqual(resp.json["round_trips"], 1)
+    self.assertEqual(resp.json["collscans"], 0)
+    self.assertIn({"path": "/", "slug": self.user["slug"]}, [query["filter"] for query in resp.json["queries"]])
+
+  def testClientId(self):
+    # the client's id doesn't name the profile so another client can't overwrite it or read it
+    _, first = self.app.test_client.get(self.url, headers = {"X-Request-Id": "test-profile"})
+    _, second = self.app.test_client.get("/", headers = {"X-Request-Id": "test-profile"})
+
+    self.assertNotEqual(first.headers["X-Request-Id"], "test-profile")
+    self.assertNotEqual(first.headers["X-Request-Id"], second.headers["X-Request-Id"])
+
+    _, resp = self.app.test_client.get("/_profile/test-profile")
+
+    self.assertEqual(resp.status, 404)
+
+    _, resp = self.app.test_client.get("/_profile/{}".format(first.headers["X-Request-Id"]))
+
+    self.assertEqual(resp.json["url"], self.url)
+    self.assertEqual(resp.json["client_id"], "test-profile")
+
+  def testDisabled(self):
+    app = create_app()
+    app._debug_endpoints()
+
+    _, resp = app.test_client.get(self.url)
+
+    self.assertNotIn("X-Request-Id", resp.headers)
+
+    _, resp = app.test_client.get("/_profile/anything")
+
+    self.assertEqual(resp.status, 404)
@@ -0,0 +1,56 @@
+from unittest import TestCase
+from datetime import datetime, timezone
+
+from ySanic import byte_range, etag_matches, not_modified
+
+class TestRanges(TestCase):
+  def testWhole(self):
+    self.assertEqual(byte_range("bytes=0-", 100), (0, 99))
+    self.assertEqual(byte_range("bytes=0-99", 100), (0, 99))
+
+  def testBounded(self):
+    self.assertEqual(byte_range("bytes=10-19", 100), (10, 19))
+    self.assertEqual(byte_range("bytes=90-150", 100), (90, 99))
+
+  def testOpenEnded(self):
+    self.assertEqual(byte_range("bytes=90-", 100), (90, 99))
+
+  def testSuffix(self):
+    self.assertEqual(byte_range("bytes=-10", 100), (90, 99))
+    self.assertEqual(byte_range("bytes=-500", 100), (0, 99))
+
+  def testUnsatisfiable(self):
+    self.assertIsNone(byte_range("bytes=100-", 100))
+    self.assertIsNone(byte_range("bytes=150-160", 100))
+    self.assertIsNone(byte_range("bytes=-0", 100))
+
+  def testIgnored(self):
+    # several ranges, other units and invalid ranges get the whole file
+    self.assertEqual(byte_range("bytes=0-9,20-29", 100), (0, 99))
+    self.assertEqual(byte_range("items=0-9", 100), (0, 99))
+    self.assertEqual(byte_range("bytes=20-10", 100), (0, 99))
+    self.assertEqual(byte_range("bytes=a-b", 100), (0, 99))
+    self.assertEqual(byte_range("bytes=-", 100), (0, 99))
+
+class TestConditional(TestCase):
+  etag = '"5e1b"'
+  modified = datetime(2020, 1, 2, 3, 4, 5, 678, tzinfo = timezone.utc)
+
+  def testIfNoneMatch(self):
+    self.assertTrue(etag_matches({"If-None-Match": self.etag}, self.etag))
+    self.assertTrue(etag_matches({"If-None-Match": '"other", W/{}'.format(self.etag)}, self.etag))
+    self.assertTrue(etag_matches({"If-None-Match": "*"}, self.etag))
+    self.assertFalse(etag_matches({"If-None-Match": '"other"'}, self.etag))
+    self.assertFalse(etag_matches({}, self.etag))
+
+  def testIfModifiedSince(self):
+    self.assertTrue(not_modified({"If-Modified-Since": "Thu, 02 Jan 2020 03:04:05 GMT"}, self.etag, self.modified))
+    self.assertTrue(not_modified({"If-Modified-Since": "Fri, 03 Jan 2020 00:00:00 GMT"}, self.etag, self.modified))
+    self.assertFalse(not_modified({"If-Modified-Since": "Thu, 02 Jan 2020 03:04:04 GMT"}, self.etag, self.modified))
+    self.assertFalse(not_modified({"If-Modified-Since": "yesterday"}, self.etag, self.modified))
+    self.assertFalse(not_modified({}, self.etag, self.modified))
+
+  def testIfNoneMatchWins(self):
+    headers = {"If-None-Match": '"other"', "If-Modified-Since": "Fri, 03 Jan 2020 00:00:00 GMT"}
+
+    self.assertFalse(not_modified(headers, self.etag, self.modified))
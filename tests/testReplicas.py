@@ -0,0 +1,85 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from pymongo import MongoClient
+
+from slugify import slugify
+
+from ySanic import replicas
+
+from tests.app.app import create_app
+
+class Request:
+  def __init__(self, cookies):
+    self.cookies = cookies
+
+class TestReadPreference(TestCase):
+  def testModes(self):
+    self.assertEqual(replicas.read_preference(True).mongos_mode, "secondaryPreferred")
+    self.assertEqual(replicas.read_preference("nearest").mongos_mode, "nearest")
+    self.assertEqual(replicas.read_preference("secondary", 120).max_staleness, 120)
+
+    for mode in ("primary", "secondarypreferred", 1):
+      with self.assertRaises(ValueError):
+        replicas.read_preference(mode)
+
+  def testPinned(self):
+    with patch("ySanic.replicas.time", return_value = 100):
+      self.assertTrue(replicas.pinned(Request({"ysanic_primary": "105"}), "ysanic_primary"))
+      self.assertFalse(replicas.pinned(Request({"ysanic_primary": "95"}), "ysanic_primary"))
+      self.assertFalse(replicas.pinned(Request({"ysanic_primary": "soon"}), "ysanic_primary"))
+      self.assertFalse(replicas.pinned(Request({}), "ysanic_primary"))
+
+class TestReplicas(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    name = "Test Replicas"
+    self.user = {"type": "User", "name": name, "email": "testreplicas@ysanic.net", "slug": slugify(name), "path": "/", "trees": []}
+    self.user["_id"] = self.table.insert_one(self.user).inserted_id
+    self.table.update_one({"type": "Community"}, {"$addToSet": {"users": self.user["_id"]}})
+
+  def tearDown(self):
+    self.table.delete_one({"_id": self.user["_id"]})
+    self.table.update_one({"type": "Community"}, {"$pull": {"users": self.user["_id"]}})
+
+    self.client.close()
+
+  def testReadReplicas(self):
+    self.app.config.READ_REPLICAS = True
+    name = "Replica Tree"
+    data = {"type": "Node", "name": name, "path": "/{}".format(self.user["slug"]), "slug": slugify(name), "nodes": []}
+    self.table.insert_one(data)
+    self.table.update_one({"_id": self.user["_id"]}, {"$addToSet": {"trees": data["slug"]}})
+    url = "/{}/{}".format(self.user["slug"], data["slug"])
+    reads = []
+    replica_table = self.app._replica_table
+    def observed_replica_table():
+      reads.append(replicas.current.get())
+      return replica_table()
+    self.app._replica_table = observed_replica_table
+
+    _, resp = self.app.test_client.get(url)
+
+    self.assertEqual(resp.status, 200)
+    self.assertNotIn("ysanic_primary", resp.cookies)
+    self.assertTrue(reads)
+    self.assertTrue(all(reads))
+    self.assertEqual(replica_table().read_preference.mongos_mode, "secondaryPreferred")
+
+    _, resp = self.app.test_client.put(url, json = {"name": "Replica Tree 2", "slug": data["slug"]})
+
+    self.assertEqual(resp.status, 200)
+    self.assertIn("ysanic_primary", resp.cookies)
+
+    reads.clear()
+    _, resp = self.app.test_client.get(url, cookies = {"ysanic_primary": resp.cookies["ysanic_primary"]})
+
+    self.assertEqual(resp.status, 200)
+    self.assertEqual(resp.json["result"]["name"], "Replica Tree 2")
+    self.assertListEqual([], reads)
+
+    self.table.delete_one({"_id": data["_id"]})
+    self.table.update_one({"_id": self.user["_id"]}, {"$pull": {"trees": data["slug"]}})
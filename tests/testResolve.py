@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from pymongo import MongoClient
+
+from slugify import slugify
+
+from tests.app.app import create_app
+
+class TestResolve(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    self.app.test_client.get("/")
+
+    name = "Test Resolve"
+    self.user = {"type": "User", "name": name, "email": "testresolve@ysanic.net", "slug": slugify(name), "path": "/", "trees": []}
+    self.user["_id"] = self.table.insert_one(self.user).inserted_id
+    self.table.update_one({"type": "Community"}, {"$addToSet": {"users": self.user["_id"]}})
+
+    # /test-resolve/tree/child/grandchild
+    self.nodes = []
+    path = "/{}".format(self.user["slug"])
+    for name in ("Tree", "Child", "Grandchild"):
+      node = {"type": "Node", "name": name, "path": path, "slug": slugify(name), "nodes": []}
+      node["_id"] = self.table.insert_one(node).inserted_id
+      self.nodes.append(node)
+      path = "{}/{}".format(path, node["slug"])
+    self.table.update_one({"_id": self.user["_id"]}, {"$addToSet": {"trees": self.nodes[0]["slug"]}})
+    for parent, child in zip(self.nodes, self.nodes[1:]):
+      self.table.update_one({"_id": parent["_id"]}, {"$addToSet": {"nodes": child["slug"]}})
+
+  def tearDown(self):
+    self.table.delete_many({"_id": {"$in": [node["_id"] for node in self.nodes]}})
+    self.table.delete_one({"_id": self.user["_id"]})
+    self.table.update_one({"type": "Community"}, {"$pull": {"users": self.user["_id"]}})
+
+    self.client.close()
+
+  def resolve(self, url, single_query):
+    self.app.config.RESOLVE_SINGLE_QUERY = single_query
+    _, resp = self.app.test_client.get(url)
+    return resp.status, resp.json
+
+  def assertSameResolution(self, url, status):
+    by_segments = self.resolve(url, False)
+    at_once = self.resolve(url, True)
+
+    self.assertEqual(by_segments[0], status)
+    self.assertEqual(by_segments, at_once)
+    return at_once[1]
+
+  def testDeepPath(self):
+    url = "/{}/tree/child/grandchild".format(self.user["slug"])
+
+    result = self.assertSameResolution(url, 200)
+
+    self.assertEqual(result["result"]["_id"], str(self.nodes[2]["_id"]))
+
+  def testDeepMember(self):
+    url = "/{}/tree/child/grandchild/get_ancestors".format(self.user["slug"])
+
+    result = self.assertSameResolution(url, 200)
+
+    self.assertListEqual(["", self.user["slug"], "tree", "child"], [ancestor["path"] and ancestor["slug"] for ancestor in result["result"]])
+
+  def testMissingMiddleSegment(self):
+    self.assertSameResolution("/{}/missing/child".format(self.user["slug"]), 404)
+    self.assertSameResolution("/{}/missing/child/get_ancestors".format(self.user["slug"]), 404)
+    self.assertSameResolution("/{}/tree/missing/grandchild".format(self.user["slug"]), 404)
+
+  def testRoot(self):
+    result = self.assertSameResolution("/", 200)
+
+    self.assertEqual(result["result"]["path"], "")
+    self.assertSameResolution("/get_users", 200)
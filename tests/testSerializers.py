@@ -0,0 +1,62 @@
+from unittest import TestCase
+from unittest.mock import patch
+from datetime import datetime, timezone
+from json import loads
+import re
+
+from bson import ObjectId, Decimal128
+
+from ySanic import fast_dumps
+
+class TestSerializers(TestCase):
+  def both(self, data):
+    with patch("ySanic.orjson", None):
+      fallback = fast_dumps(data)
+
+    return fast_dumps(data), fallback
+
+  def assertSameBytes(self, data):
+    # without orjson both are the fallback and only the expected data is checked
+    fast, fallback = self.both(data)
+
+    self.assertEqual(fast, fallback)
+    return loads(fallback)
+
+  def testObjectId(self):
+    _id = ObjectId()
+
+    self.assertEqual(self.assertSameBytes({"_id": _id}), {"_id": str(_id)})
+
+  def testDatetime(self):
+    data = {"naive": datetime(2020, 1, 2, 3, 4, 5, 678901), "aware": datetime(2020, 1, 2, tzinfo = timezone.utc)}
+
+    self.assertEqual(self.assertSameBytes(data), {"naive": "2020-01-02T03:04:05.678", "aware": "2020-01-02T00:00:00.000+00:00"})
+
+  def testOthers(self):
+    data = {"decimal": Decimal128("1.10"), "set": {1}, "pattern": re.compile("a"), "tuple": (1, 2)}
+
+    self.assertEqual(self.assertSameBytes(data), {"decimal": "1.10", "set": "{1}", "pattern": "re.compile('a')", "tuple": [1, 2]})
+
+  def testNestedPapers(self):
+    _ids = [ObjectId(), ObjectId()]
+    modified = datetime(2020, 1, 2)
+    data = {"_id": _ids[0], "path": "", "users": [_ids[1]], "nodes": [{"_id": _ids[1], "path": "/", "modified": modified, "nodes": []}]}
+
+    self.assertEqual(self.assertSameBytes(data), {
+      "_id": str(_ids[0]), "path": "", "users": [str(_ids[1])],
+      "nodes": [{"_id": str(_ids[1]), "path": "/", "modified": "2020-01-02T00:00:00.000", "nodes": []}]
+    })
+
+  def testNonStrKeys(self):
+    _id = ObjectId()
+    data = {1: "int", 1.5: "float", None: "none", False: "bool", _id: "objectid", datetime(2020, 1, 2): "datetime", "nested": [{2: "int"}]}
+
+    self.assertEqual(self.assertSameBytes(data), {
+      "1": "int", "1.5": "float", "null": "none", "false": "bool", str(_id): "objectid", "2020-01-02T00:00:00.000": "datetime", "nested": [{"2": "int"}]
+    })
+
+  def testUnserializable(self):
+    with self.assertRaises(TypeError):
+      fast_dumps({"value": object()})
+    with patch("ySanic.orjson", None), self.assertRaises(TypeError):
+      fast_dumps({"value": object()})
@@ -0,0 +1,92 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from pymongo import MongoClient
+
+from slugify import slugify
+
+from ySanic.timing import Timings, current, timed
+
+from tests.app.app import create_app
+
+class TestTimings(TestCase):
+  def testHeader(self):
+    with patch("ySanic.timing.perf_counter", return_value = 10):
+      timings = Timings()
+    timings.add("mongo", 0.002)
+    timings.add("mongo", 0.003)
+    timings.add("dump", 0.0005)
+
+    with patch("ySanic.timing.perf_counter", return_value = 10.01):
+      header = timings.header()
+
+    self.assertEqual(header, 'mongo;desc="2x";dur=5.000, dump;dur=0.500, total;dur=10.000')
+    self.assertEqual(timings.count("mongo"), 2)
+    self.assertEqual(timings.count("load"), 0)
+
+  def testTimed(self):
+    # without timings for the request nothing is timed
+    with timed("load"):
+      pass
+
+    timings = Timings()
+    token = current.set(timings)
+    try:
+      with timed("load"):
+        pass
+      with timed("load"):
+        pass
+    finally:
+      current.reset(token)
+
+    self.assertEqual(timings.count("load"), 2)
+
+class TestServerTiming(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.app.config.SERVER_TIMING = True
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    name = "Test Timing"
+    self.user = {"type": "User", "name": name, "email": "testtiming@ysanic.net", "slug": slugify(name), "path": "/", "trees": []}
+    self.user["_id"] = self.table.insert_one(self.user).inserted_id
+    self.table.update_one({"type": "Community"}, {"$addToSet": {"users": self.user["_id"]}})
+
+  def tearDown(self):
+    self.table.delete_one({"_id": self.user["_id"]})
+    self.table.update_one({"type": "Community"}, {"$pull": {"users": self.user["_id"]}})
+
+    self.client.close()
+
+  def phases(self, resp):
+    return {metric.split(";")[0] for metric in resp.headers["Server-Timing"].split(", ")}
+
+  def testHeader(self):
+    _, resp = self.app.test_client.get("/{}".format(self.user["slug"]))
+
+    self.assertEqual(resp.status, 200)
+    self.assertTrue({"resolve", "mongo", "handler", "dump", "serialize", "total"} <= self.phases(resp))
+
+  def testNotFound(self):
+    _, resp = self.app.test_client.get("/missing-user")
+
+    self.assertEqual(resp.status, 404)
+    self.assertIn("total", self.phases(resp))
+
+  def testHooks(self):
+    seen = []
+    self.app.add_timing_hook(lambda request, timings: seen.append((timings.operation, timings.status, timings.count("mongo"))))
+
+    self.app.test_client.get("/{}".format(self.user["slug"]))
+
+    self.assertEqual(len(seen), 1)
+    self.assertEqual(seen[0][:2], ("User/call", 200))
+    self.assertGreater(seen[0][2], 0)
+
+  def testDisabled(self):
+    app = create_app()
+
+    _, resp = app.test_client.get("/{}".format(self.user["slug"]))
+
+    self.assertNotIn("Server-Timing", resp.headers)
@@ -0,0 +1,88 @@
+from unittest import TestCase
+from asyncio import run
+from copy import deepcopy
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+from slugify import slugify
+
+from ySanic import MongoySanic, trusted_load
+
+from benchmarks import models
+from benchmarks.fake import FakeTable
+
+from tests.app.app import create_app
+
+class TestTrustedLoad(TestCase):
+  def setUp(self):
+    self.doc = {"_id": ObjectId(), "type": "Node", "path": "/", "slug": "a", "name": "A", "nodes": ["b"]}
+    self.app = MongoySanic(models, name = "trusted", table = FakeTable([dict(self.doc)]))
+
+  def testSameData(self):
+    validated = models.Node(self.app.table)
+    validated.load(dict(self.doc))
+    trusted = self.app._trusted_paper(models.Node, dict(self.doc))
+
+    self.assertEqual(trusted.get_data(), validated.get_data())
+    self.assertIs(trusted.table, self.app.table)
+
+  def testDefaults(self):
+    doc = dict(self.doc)
+    del doc["nodes"]
+    model = models.Node()
+    trusted_load(model, doc)
+
+    self.assertEqual(model.get_data()["nodes"], [])
+
+  def testOwnState(self):
+    one, other = self.app._trusted_paper(models.Node, deepcopy(self.doc)), self.app._trusted_paper(models.Node, deepcopy(self.doc))
+
+    self.assertIsNot(one.fields["name"], other.fields["name"])
+    self.assertIs(one.fields["name"].parent, one)
+
+    one.context["user"] = "someone"
+    one.get_data()["nodes"].append("c")
+
+    self.assertNotIn("user", other.context)
+    self.assertEqual(other.get_data()["nodes"], ["b"])
+
+  def testTrusts(self):
+    self.assertFalse(self.app.trusts(models.Node))
+
+    self.app.config.TRUSTED_READS = True
+
+    self.assertTrue(self.app.trusts(models.Node))
+
+    async def load():
+      return await self.app.get_paper("/a")
+
+    self.assertEqual(run(load()).get_data()["name"], "A")
+
+class TestTrustedReads(TestCase):
+  def setUp(self):
+    self.app = create_app()
+    self.app.config.TRUSTED_READS = True
+    self.client = MongoClient(self.app.config["MONGO_URI"])
+    self.table = self.client.tests.tests
+
+    name = "Test Trusted"
+    self.user = {"type": "User", "name": name, "email": "testtrusted@ysanic.net", "slug": slugify(name), "path": "/", "trees": []}
+    self.user["_id"] = self.table.insert_one(self.user).inserted_id
+    self.table.update_one({"type": "Community"}, {"$addToSet": {"users": self.user["_id"]}})
+
+  def tearDown(self):
+    self.table.delete_one({"_id": self.user["_id"]})
+    self.table.update_one({"type": "Community"}, {"$pull": {"users": self.user["_id"]}})
+
+    self.client.close()
+
+  def testTrustedReads(self):
+    url = "/{}".format(self.user["slug"])
+
+    _, trusted = self.app.test_client.get(url)
+    self.app.config.TRUSTED_READS = False
+    _, validated = self.app.test_client.get(url)
+
+    self.assertEqual(trusted.status, 200)
+    self.assertEqual(trusted.json["result"], validated.json["result"])
@@ -1,18 +1,43 @@
 from inspect import getmembers, isclass, isfunction, ismethod, iscoroutinefunction
-from time import perf_counter, process_time
+from time import monotonic
+from copy import deepcopy
 from pathlib import PurePath
 from logging import getLogger, INFO
 from functools import wraps
-from smtplib import SMTP_SSL
+from collections import namedtuple
+from types import MappingProxyType
+from urllib.parse import unquote
+from asyncio import ensure_future, gather, get_running_loop
 from email.mime.text import MIMEText
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime, timezone
+from hashlib import sha1, sha256
+from uuid import uuid4
+import pickle
+from warnings import warn
 
 from sanic import Sanic, response
 from sanic.blueprints import Blueprint
 from sanic.log import logger
-from sanic.exceptions import InvalidUsage, MethodNotSupported
+from sanic.exceptions import InvalidUsage, MethodNotSupported, SanicException
+
+from bson import ObjectId, Decimal128
+from gridfs.errors import NoFile
+from pymongo.errors import OperationFailure, PyMongoError
 
 from yModel import Schema, Tree, ErrorSchema
-from yModel.mongo import NotFound, MongoJSONEncoder
+from yModel.mongo import NotFound, MongoJSONEncoder, ObjectId as yObjectId
+from slugify import slugify
+
+from ySanic.cache import TTLCache
+from ySanic.mail import Mailer
+from ySanic.timing import Timings, current as current_timings, timed
+from ySanic.identity import IdentityMap, current as current_identity_map
+from ySanic.metrics import Metrics
+from ySanic.openapi import build_document, Document
+from ySanic.profiler import Profile, ProfiledTable, current as current_profile
+from ySanic import replicas
+from ySanic import introspection, indexes
 
 from json import dumps
 
@@ -22,9 +47,46 @@ if hasattr(re, '_pattern_type'):
 else:
   from typing import Pattern as isPattern
 
+from marshmallow.decorators import PRE_LOAD, POST_LOAD
+from marshmallow.utils import missing
+
 from sanic.views import CompositionView
 from typing import Type, Callable
 
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+DEFAULT_MEMBERS = {"GET": "__call__", "PUT": "update", "DELETE": "remove"}
+
+Endpoint = namedtuple("Endpoint", ["method", "name", "coroutine", "factory", "operation"])
+
+BATCH_FACTORY = re.compile(r"^(.*)/new/([^/]+)/?$")
+
+CORS_HEADERS = {
+  "Access-Control-Allow-Origin": "*",
+  "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+  "Access-Control-Allow-Headers": "Access-Control-Allow-Origin, Access-Control-Allow-Headers, Origin, X-Requested-With, Content-Type, Authorization"
+}
+
+class BatchRequest:
+  """The request of an operation inside a batch: the batch's request with its own method, path and body"""
+  def __init__(self, request, method, path, body, resolved):
+    self.request = request
+    self.method = method.upper()
+    self.path = path
+    self.json = body if body is not None else {}
+    self.resolved = resolved
+
+  def __getattr__(self, name):
+    return getattr(self.request, name)
+
+def _valid_operation(operation):
+  """An operation of a batch has a path, a method (GET if it's missing) as strings and a body (if any) as an object"""
+  return isinstance(operation, dict) and isinstance(operation.get("path", None), str) and \
+    isinstance(operation.get("method", "GET"), str) and isinstance(operation.get("body", None), (dict, type(None)))
+
 class MyEncoder(MongoJSONEncoder):
   def default(self, obj):
     if isclass(obj) or ismethod(obj) or isfunction(obj) or isinstance(obj, (CompositionView, frozenset, isPattern, Type, Callable, set)):
@@ -32,19 +94,204 @@ class MyEncoder(MongoJSONEncoder):
 
     return MongoJSONEncoder.default(self, obj)
 
+_my_encoder = MyEncoder()
+
+def fast_default(obj):
+  """The common types of MyEncoder without the JSONEncoder machinery, the rest goes to MyEncoder"""
+  if isinstance(obj, (ObjectId, Decimal128)):
+    return str(obj)
+  elif isinstance(obj, datetime):
+    return obj.isoformat(timespec = 'milliseconds')
+  elif isinstance(obj, (set, frozenset, isPattern)):
+    return str(obj)
+
+  return _my_encoder.default(obj)
+
+def _json_key(key):
+  # the keys as the standard json writes them, the rest as their values (ObjectId, datetime...)
+  if isinstance(key, str):
+    return key
+  elif key is None or isinstance(key, (bool, int, float)):
+    return dumps(key)
+
+  value = fast_default(key)
+  return value if isinstance(value, str) else str(value)
+
+def _str_keys(data):
+  if isinstance(data, dict):
+    return {_json_key(key): _str_keys(value) for key, value in data.items()}
+  elif isinstance(data, (list, tuple)):
+    return [_str_keys(value) for value in data]
+
+  return data
+
+def fast_dumps(data):
+  """
+  Serializes to JSON bytes with orjson if it's installed or with the standard json if it's not
+  Both write the same bytes: the data with keys that aren't strings is serialized again with them converted
+  """
+  try:
+    if orjson is not None:
+      return orjson.dumps(data, default = fast_default, option = orjson.OPT_PASSTHROUGH_DATETIME)
+
+    return dumps(data, default = fast_default, separators = (",", ":")).encode("utf-8")
+  except TypeError:
+    plain = _str_keys(data)
+    if plain == data:
+      raise
+
+    return fast_dumps(plain)
+
+def _trusted_data(model, doc):
+  data = model._invoke_load_processors(PRE_LOAD, dict(doc), False, original_data = doc)
+  result = model.dict_class()
+  for name, field in model.fields.items():
+    if field.dump_only:
+      continue
+
+    value = data.get(name, missing)
+    if value is missing and field.load_from:
+      value = data.get(field.load_from, missing)
+    if value is missing:
+      value = field.missing() if callable(field.missing) else field.missing
+      if value is missing:
+        continue
+      value = deepcopy(value)
+    result[field.attribute or name] = value
+
+  return dict(model._invoke_load_processors(POST_LOAD, result, False, original_data = doc))
+
+def trusted_load(model, data, many = False):
+  """
+  Loads documents written by ourselves without validating them, as fast as load can't
+  The load hooks still run, the declared fields are taken as they are stored and the missing ones get their default
+  """
+  model.__data__ = [_trusted_data(model, doc) for doc in data] if many else _trusted_data(model, data)
+
+def _cursor_start(order, after):
+  """
+  Where the page after the cursor starts in the order of the children (None if the cursor is only a key that isn't there)
+  The cursor is position:key, the key is found at its position, moved to another one or, if it was removed, the page starts at its position
+  """
+  position, _, key = after.partition(":")
+  if not position.isdigit() or not key:
+    position, key = None, after
+  else:
+    position = int(position)
+    if position < len(order) and order[position] == key:
+      return position + 1
+
+  if key in order:
+    return order.index(key) + 1
+
+  return min(position, len(order)) if position is not None else None
+
+def etag_matches(headers, etag):
+  """If the If-None-Match of the headers has the etag (or *)"""
+  if_none_match = headers.get("If-None-Match", None)
+  if if_none_match is None:
+    return False
+
+  tags = [tag.strip() for tag in if_none_match.split(",")]
+  return "*" in tags or etag in tags or "W/{}".format(etag) in tags
+
+def not_modified(headers, etag, modified):
+  """If the client already has the version with etag, modified at modified (If-None-Match wins over If-Modified-Since)"""
+  if headers.get("If-None-Match") is not None:
+    return etag_matches(headers, etag)
+
+  if_modified_since = headers.get("If-Modified-Since")
+  if if_modified_since is not None:
+    try:
+      return modified.replace(microsecond = 0) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+      return False
+
+  return False
+
+def byte_range(header, length):
+  """
+  The (start, end) (both included) of the Range header of a file of length bytes, None if it's not satisfiable
+  Several ranges, an unknown unit or an invalid range are ignored (the whole file is served)
+  """
+  whole = (0, length - 1)
+  unit, _, ranges = header.partition("=")
+  if unit.strip() != "bytes" or "," in ranges:
+    return whole
+
+  start, _, end = ranges.strip().partition("-")
+  try:
+    if start:
+      start, end = int(start), int(end) if end else None
+      if start < 0 or end is not None and end < start:
+        return whole
+      end = length - 1 if end is None else min(end, length - 1)
+    else:
+      suffix = int(end)
+      if suffix < 0:
+        return whole
+      start, end = max(length - suffix, 0), length - 1
+  except ValueError:
+    return whole
+
+  return (start, end) if start <= end else None
+
+class MoveError(Exception):
+  """A subtree can't be moved where it was asked to"""
+  def __init__(self, message, code = 400):
+    super().__init__(message)
+    self.message = message
+    self.code = code
+
 class ySanic(Sanic):
   log = logger
 
   def __init__(self, models, **kwargs):
+    batch = kwargs.pop("batch", False)
+    children_pages = kwargs.pop("children_pages", False)
+    subtree_routes = kwargs.pop("subtree_routes", False)
+    introspection_cache = kwargs.pop("introspection_cache", None)
     super().__init__(**kwargs)
 
     self.models = models
+    self._mailer = None
+    self._timing = False
+    self._pinning = False
+    self.timing_hooks = []
+    self.metrics = None
+    self._openapi = None
+    self._allows = None
+    self.error_handler.add(MethodNotSupported, self._preflight)
 
     if hasattr(self, "_add_openapi_route"):
       self._add_openapi_route()
 
-    self._checkings = self._checks(models)
+    self._checkings = self._introspect(models, introspection_cache)
+    # before the generated routes since /<path:path>/ would take them
+    # True for every member or the "Model.member" ones
+    self._children_pages = children_pages if children_pages is True else frozenset(children_pages or ())
+    if children_pages:
+      self._children_routes()
+    if subtree_routes and self._checkings["trees"]:
+      self._route_adder("/<path:path>/", "_subtree", "DELETE", self.subtree_remover)
+      self._route_adder("/<path:path>/", "_move", "PUT", self.subtree_mover)
+    for path in self._checkings.pop("paths"):
+      self._route_adder(*path)
     self._permissions = self._checkings.pop("perms")
+    self._dispatch = self._checkings.pop("dispatch")
+    self._members = self._checkings.pop("members")
+    self._read_only = self._read_only_members()
+
+    if batch:
+      self._route_adder("", "/_batch", "POST", self.batch)
+
+    self.register_listener(self._start_mailer, "before_server_start")
+    self.register_listener(self._stop_mailer, "before_server_stop")
+    self.register_listener(self._setup_timing, "before_server_start")
+    self.register_listener(self._setup_openapi, "before_server_start")
+    self.register_listener(self._sort_routes, "before_server_start")
+    self.register_listener(self._setup_preflights, "before_server_start")
+    self.register_listener(self._setup_replicas, "before_server_start")
 
   def _is_recursive(self, model):
     return hasattr(model[1], "children_models") and model[0] in model[1].children_models.values()
@@ -128,12 +375,20 @@ class ySanic(Sanic):
 
     return schemas, perms
 
+  def _dispatch_entries(self, model, endpoint, verb, factory, is_root = False):
+    members = [as_ for as_, member in model[1].factories.items() if member == endpoint[0]] if factory else [endpoint[0]]
+    # the same operationId than _build
+    operation = "{}/{}".format("Root" if is_root else model[1].__name__, "call" if endpoint[0] == "__call__" else endpoint[0])
+    entry = Endpoint(getattr(model[1], endpoint[0]), endpoint[0], iscoroutinefunction(endpoint[1]), factory, operation)
+    return {(model[1], member, verb): entry for member in members}
+
   def _check(self, model, models, is_root = False):
     routes = {}
     params = {}
     schemas = {}
     perms = []
     paths = {"no_path": [], "path": []}
+    dispatch = {}
     path_name = "{}_Path".format(model[0])
     path = "/{{{}}}/".format(path_name)
     real_path = "/<path:path>/"
@@ -203,13 +458,15 @@ class ySanic(Sanic):
             paths["no_path"].append((None, "/", verb, real_endpoint))
           elif real_route == "new/<as_>" and ("/", 'new/<as_>', "POST", real_endpoint) not in paths["no_path"]:
             paths["no_path"].append(("/", real_route, verb, real_endpoint))
-        if "notaroute" not in keys or endpoint[1].__decorators__["notaroute"]["when"] is None or "recursive" not in endpoint[1].__decorators__["notaroute"]["when"]:
+          dispatch.update(self._dispatch_entries(model, endpoint, verb, real_endpoint == self.factory, True))
+        if recursive and ("notaroute" not in keys or endpoint[1].__decorators__["notaroute"]["when"] is None or "recursive" not in endpoint[1].__decorators__["notaroute"]["when"]):
           has_schemas, has_perms = self._build(model[1], endpoint[1], routes, route, verb, code, path_param, models)
           if has_schemas:
             schemas.update(has_schemas)
           if has_perms:
             perms += has_perms
           paths["path"].append((real_path, real_route, verb, real_endpoint))
+          dispatch.update(self._dispatch_entries(model, endpoint, verb, real_endpoint == self.factory, True))
       elif "notaroute" not in keys or endpoint[1].__decorators__["notaroute"]["when"] is None or "main" not in endpoint[1].__decorators__["notaroute"]["when"]:
         has_schemas, has_perms = self._build(model[1], endpoint[1], routes, route, verb, code, path_param, models)
         if has_schemas:
@@ -217,6 +474,7 @@ class ySanic(Sanic):
         if has_perms:
             perms += has_perms
         paths["path"].append((real_path, real_route, verb, real_endpoint))
+        dispatch.update(self._dispatch_entries(model, endpoint, verb, real_endpoint == self.factory))
 
       if path_param:
         if path_name not in params:
@@ -224,7 +482,7 @@ class ySanic(Sanic):
             "name": path_name, "in": "path", "description": "The {}'s URI".format(model[0]), "required": True, "schema": {"type": "string"}
           }
 
-    return {"recursive": recursive, "routes": routes, "params": params, "schemas": schemas, "perms": perms, "paths": paths}
+    return {"recursive": recursive, "routes": routes, "params": params, "schemas": schemas, "perms": perms, "paths": paths, "dispatch": dispatch}
 
   def _checks(self, models = None):
     if models is None:
@@ -233,6 +491,7 @@ class ySanic(Sanic):
     root = None
     trees = []
     perms = []
+    dispatch = {}
 
     for model in getmembers(models, lambda m: isclass(m) and issubclass(m, Tree)):
       if hasattr(model[1], "auth") or hasattr(model, "get_global_context"):
@@ -240,6 +499,7 @@ class ySanic(Sanic):
         has_perms = checks.pop("perms", False)
         if has_perms:
           perms.extend(has_perms)
+        dispatch.update(checks.pop("dispatch", {}))
         root = (model[0], model[1], checks)
       else:
         if "path" in model[1]._declared_fields:
@@ -247,21 +507,88 @@ class ySanic(Sanic):
           has_perms = checks.pop("perms", False)
           if has_perms:
             perms.extend(has_perms)
+          dispatch.update(checks.pop("dispatch", {}))
           trees.append((model[0], model[1], checks))
 
+    paths = []
     root_paths = root[2].pop("paths", {})
     if root_paths:
       if "no_path" in root_paths:
-        for path in root_paths["no_path"]:
-          self._route_adder(*path)
+        paths.extend(root_paths["no_path"])
       if "path" in root_paths:
-        for path in root_paths["path"]:
-          self._route_adder(*path)
+        paths.extend(root_paths["path"])
     for tree in trees:
-      for path in tree[2].pop("paths", [])["path"]:
-        self._route_adder(*path)
+      paths.extend(tree[2].pop("paths", [])["path"])
 
-    return {"root": root, "trees": trees, "perms": perms}
+    members = {}
+    for _, member, verb in dispatch:
+      members.setdefault(verb, set()).add(member)
+
+    return {"root": root, "trees": trees, "perms": perms, "paths": paths, "dispatch": MappingProxyType(dispatch),
+      "members": MappingProxyType({verb: frozenset(names) for verb, names in members.items()})}
+
+  def _introspect(self, models, cache = None):
+    """
+    The result of _checks
+    With a cache file it's read from there when it was saved for the same sources (the models module and the app's classes)
+    and saved there otherwise so the next workers and boots don't have to go through the models
+    """
+    if cache is None:
+      return self._checks(models)
+
+    key = introspection.source_key(models, self.__class__)
+    checkings = introspection.load(cache, key, self)
+    if checkings is None:
+      checkings = self._checks(models)
+      try:
+        introspection.dump(cache, key, checkings, self)
+      except (OSError, pickle.PicklingError) as e:
+        self.log.warning("The introspection couldn't be saved in {}: {}".format(cache, e))
+
+    return checkings
+
+  def _lists_children(self, model, member):
+    return member in getattr(model, "children_models", {}) and (self._children_pages is True or "{}.{}".format(model.__name__, member) in self._children_pages)
+
+  def _children_routes(self):
+    """Adds the paginated listing of the children_models members of the root and the trees in children_pages (and their OpenAPI fragments)"""
+    root = self._checkings["root"]
+    for name, model, checks in ([root] if root else []) + self._checkings["trees"]:
+      members = [(member, child) for member, child in getattr(model, "children_models", {}).items() if self._lists_children(model, member)]
+      if not members:
+        continue
+
+      urls = []
+      if root and model is root[1]:
+        urls.append(("/_children/", False, "/", "_children/<member>"))
+      if not root or model is not root[1] or checks["recursive"]:
+        urls.append(("/{{{}_Path}}/_children/".format(name), True, "/<path:path>/", "_children/<member>"))
+
+      for route, path_param, prefix, url in urls:
+        for member, child in members:
+          self._children_fragment(checks, name, "{}{}".format(route, member), path_param, member, child)
+        self._route_adder(prefix, url, "GET", self.list_children)
+
+  def _children_fragment(self, checks, name, route, path_param, member, child):
+    parameters = [{"$ref": "#/components/parameters/{}_Path".format(name)}] if path_param else []
+    parameters += [
+      {"name": "limit", "in": "query", "description": "Children by page", "schema": {"type": "integer"}},
+      {"name": "after", "in": "query", "description": "The next of the previous page", "schema": {"type": "string"}},
+      {"name": "format", "in": "query", "description": "ndjson streams the children one by line", "schema": {"type": "string", "enum": ["json", "ndjson"]}}
+    ]
+    item = {"$ref": "#/components/schemas/{}".format(child)}
+    checks["routes"][route] = {"get": {
+      "operationId": "{}/children/{}".format(name if path_param else "Root", member),
+      "summary": "The {} of the {} in pages or streamed".format(member, name),
+      "parameters": parameters,
+      "responses": {200: {"description": "A page of children and the cursor of the next one", "content": {
+        "application/json": {"schema": {"type": "object", "properties": {
+          "ok": {"type": "boolean"}, "result": {"type": "array", "items": item}, "next": {"type": "string", "nullable": True}
+        }}},
+        "application/x-ndjson": {"schema": item}
+      }}}
+    }}
+    checks["schemas"][child] = getattr(self.models, child)
 
   def _print_tree(self, models_types, models, model = None, indent = 0):
     if model is None:
@@ -281,11 +608,68 @@ class ySanic(Sanic):
     if prefix:
       url = "{}{}".format(prefix, url)
 
-    if url not in self.router.routes_all or verb not in list(self.router.routes_all[url][1]):
+    route = self.router.routes_all.get(url, None)
+    if route is None or verb not in route.methods:
       self.add_route(endpoint, url, methods = [verb])
+      if "<" in url:
+        # sanic tries in order the routes whose params can take a "/" (the default string ones too) so dispatcher's /<path:path> has to stay the last one
+        self.router.routes_always_check.sort(key = self._is_catch_all)
+
+    # the routes changed so the document and the methods of the preflights have to be built again
+    self._openapi = None
+    self._allows = None
+
+  async def _sort_routes(self, app, loop):
+    # the routes added with app.route (they don't go through _route_adder) would be after dispatcher's /<path:path> too
+    self.router.routes_always_check.sort(key = self._is_catch_all)
 
-    if url not in self.router.routes_all or "OPTIONS" not in list(self.router.routes_all[url][1]):
-      self.add_route(self.generic_options, url, methods = ["OPTIONS"])
+  def _is_catch_all(self, route):
+    return route.uri.rstrip("/").endswith("/<path:path>")
+
+  async def _setup_preflights(self, app, loop):
+    self.allowed_methods()
+
+  def allowed_methods(self):
+    """
+    The methods of every route pattern (the routes of the same URL can have a method each)
+    It's built once and kept until the routes change
+    """
+    if self._allows is None:
+      allows = {}
+      for route in self.router.routes_all.values():
+        allows.setdefault(route.pattern, set()).update(route.methods)
+      self._allows = [(pattern, frozenset(methods)) for pattern, methods in allows.items()]
+
+    return self._allows
+
+  def _allow_header(self, path):
+    methods = set()
+    for pattern, allowed in self.allowed_methods():
+      if pattern.match(path):
+        methods |= allowed
+
+    return ", ".join(sorted(methods | {"OPTIONS"})) if methods else ""
+
+  def _preflight(self, request, exception):
+    """
+    Answers OPTIONS for every route with the Allow header of the methods of the routes matching the URL
+    (there is no OPTIONS route so the router raises MethodNotSupported), the other errors get the default answer
+    The response middleware runs on it too, so it has the CORS headers only if the app registers allow_origin
+    """
+    if request.method != "OPTIONS":
+      return None
+
+    allow = self._allow_header(unquote(request.path))
+    if not allow:
+      return None
+
+    return response.raw(b"", status = 204, headers = {"Allow": allow})
+
+  async def generic_options(self, request, *args, **kwargs):
+    """Deprecated: OPTIONS is answered by the preflight handler for every route, kept for the routes added with it"""
+    warn("generic_options is deprecated, OPTIONS is answered for every route without a route of its own", DeprecationWarning, stacklevel = 2)
+    allow = self._allow_header(unquote(request.path))
+    return response.raw(b"", status = 204, headers = {"Allow": allow} if allow else None)
 
   def _add_route(self, model, type_, is_, data):
     prefix = getattr(model, "url_prefix", False)
@@ -334,6 +718,38 @@ class ySanic(Sanic):
     self._route_adder("", "/_declared_routes", "GET", self._declared_routes_endpoint)
     self._route_adder("", "/_models_tree", "GET", self._models_tree_endpoint)
 
+  def _openapi_endpoints(self, url = "/openapi.json"):
+    self._route_adder("", url, "GET", self._openapi_endpoint)
+
+  async def _setup_openapi(self, app, loop):
+    self.openapi_document()
+
+  def openapi_document(self):
+    """
+    The OpenAPI 3 document (encoded, with its ETag and gzipped) of the generated routes
+    It's built once and kept until the routes change
+    """
+    if self._openapi is None:
+      document = build_document(self._checkings, self.config.get("OPENAPI_TITLE", self.name), self.config.get("OPENAPI_VERSION", "1.0.0"))
+      self._openapi = Document(document)
+
+    return self._openapi
+
+  async def _openapi_endpoint(self, request):
+    document = self.openapi_document()
+    gzipped = "gzip" in request.headers.get("Accept-Encoding", "")
+    etag = document.gzip_etag if gzipped else document.etag
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+    if etag in [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]:
+      return response.raw(b"", status = 304, headers = headers)
+
+    if gzipped:
+      headers["Content-Encoding"] = "gzip"
+      return response.raw(document.gzip, headers = headers, content_type = "application/json")
+
+    return response.raw(document.body, headers = headers, content_type = "application/json")
+
   async def _declared_routes_endpoint(self, request):
     return response.text(self.router.routes_all)
 
@@ -347,69 +763,450 @@ class ySanic(Sanic):
     Where member-list is the list where the parent saves the children order
     So in the test model MinimalMongoTree the only factory will be /new/children
     """
-    counter, time = perf_counter(), process_time()
     if not path.startswith("/"):
       path = "/{}".format(path)
 
-    resp = await self.resolve_path(path)
+    result, code = await self._factory_result(request, path, as_)
+    return self._render(result, code)
 
-    if resp:
+  async def _factory_result(self, request, path, as_):
+    with timed("resolve"):
+      resp = await self._resolve(request, path) if as_ in self._members.get("POST", ()) else None
+    endpoint = self._dispatch.get((resp["model"].__class__, as_, "POST")) if resp else None
+
+    if endpoint is not None:
       if "path" not in request.json:
         request.json["path"] = path
 
-      method = getattr(resp["model"], resp["model"].factories[as_] if hasattr(resp["model"], "factories") and as_ in resp["model"].factories else "create_child")
-      result = await method(request, as_)
-      code = result.code if issubclass(result.__class__, ErrorSchema) else 201
-      result = result.to_plain_dict()
-
-      result['pref_counter'] = (perf_counter() - counter) * 1000
-      result['process_time'] = (process_time() - time) * 1000
-      return response.json(result, code)
-    else:
-      error = self.models.ErrorSchema()
-      error.load({"message": "{} not found".format(path), "code": 404})
-      return response.json(error.to_plain_dict(), 404)
+      self._set_operation(endpoint.operation)
+      with timed("handler"):
+        result = await endpoint.method(resp["model"], request, as_)
+      failed = issubclass(result.__class__, ErrorSchema)
+      if not failed and self.config.get("ETAGS", False):
+        await self.bump_version(resp["model"], False)
+      self.invalidate(self._url_of(resp["model"]))
+      return result, result.code if failed else 201
+
+    return self._not_found(path)
+
+  def _read_only_members(self):
+    # the GET members that don't consume anything, a name is read only if it is for every model
+    members = {}
+    for (model, member, verb), endpoint in self._dispatch.items():
+      if verb == "GET":
+        decorators = getattr(endpoint.method, "__decorators__", {})
+        members[member] = members.get(member, True) and "consumes" not in decorators
+
+    return frozenset(member for member, read_only in members.items() if read_only)
+
+  def _reads_from_replicas(self, request, path):
+    """If the request is a GET of a read only member (__call__ or a member that only produces) from a client that didn't write a moment ago"""
+    if request.method != "GET" or not self.config.get("READ_REPLICAS", False):
+      return False
+    if replicas.pinned(request, self.config.get("READ_YOUR_WRITES_COOKIE", "ysanic_primary")):
+      return False
+
+    last = path.rstrip("/").rsplit("/", 1)[-1]
+    return last not in self._members.get("GET", ()) or last in self._read_only
+
+  async def _setup_replicas(self, app, loop):
+    mode = self.config.get("READ_REPLICAS", False)
+    if mode:
+      # a wrong mode fails at startup instead of on the first read
+      replicas.read_preference(mode, self.config.get("READ_MAX_STALENESS", None))
+    if mode and not self._pinning:
+      self.register_middleware(self._read_your_writes, "response")
+      self._pinning = True
+
+  async def _read_your_writes(self, request, response):
+    # the writes are on the primary so the client reads from it until the secondaries have them
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status < 400:
+      window = self.config.get("READ_YOUR_WRITES", None) or self.config.get("READ_MAX_STALENESS", None) or 10
+      replicas.pin(response, self.config.get("READ_YOUR_WRITES_COOKIE", "ysanic_primary"), window)
 
   async def dispatcher(self, request, path = "/"):
-    counter, time = perf_counter(), process_time()
+    # the route could have consumed the member (/<path:path>/member) so the whole path is taken from the request
+    conditional = request.method == "GET" and self.config.get("ETAGS", False)
+    path = unquote(request.path)
+    token = replicas.current.set(True) if self._reads_from_replicas(request, path) else None
+    try:
+      result, code, etag = await self._dispatcher_result(request, path, conditional)
+    finally:
+      if token is not None:
+        replicas.current.reset(token)
+    if code == 304:
+      return response.raw(b"", status = 304, headers = self._etag_headers(etag))
+    elif conditional and code == 200:
+      return self._render_conditional(request, result, etag)
+
+    return self._render(result, code)
+
+  async def _dispatcher_result(self, request, path, conditional = False):
+    """
+    Resolves the path and calls the member, answering (result, code, etag)
+    When conditional, __call__ is not even called if the ETag of the model's stored version is in If-None-Match (the code is 304 then)
+    unless it has permissions: then it's called (and checked) and the ETag is compared afterwards
+    """
+    path = path.rstrip("/") or "/"
+    parts = path.split("/")
+    members = self._members.get(request.method, ())
+    is_member = parts[-1] in members
+
+    with timed("resolve"):
+      resp = await self._resolve(request, path, 1 if is_member else 0)
+      if not resp and len(parts) == 2 and is_member:
+        root = await self.get_root()
+        resp = {"model": root, "args": parts[1]}
+
+    if resp:
+      paper = resp["model"]
+      member = resp["args"] if "args" in resp else DEFAULT_MEMBERS.get(request.method)
+
+      endpoint = self._dispatch.get((paper.__class__, member, request.method))
+      if endpoint is not None:
+        url = self._url_of(paper)
+        self._set_operation(endpoint.operation)
+        etag = self.version_etag(paper, request) if conditional and member == "__call__" else None
+        if etag is not None and etag_matches(request.headers, etag) and "permission" not in getattr(endpoint.method, "__decorators__", {}):
+          return None, 304, etag
+
+        with timed("handler"):
+          result = await endpoint.method(paper, request) if endpoint.coroutine else endpoint.method(paper, request)
+        failed = issubclass(result.__class__, ErrorSchema)
+        if request.method != "GET":
+          if not failed and self.config.get("ETAGS", False):
+            await self.bump_version(paper)
+          self.invalidate(url, True)
+        return result, result.code if failed else 200, etag
+
+    return self._not_found(path) + (None,)
+
+  def _render_conditional(self, request, result, etag = None):
+    """Renders the result with its ETag (a hash of the body if it's None) or answers 304 if the client already has it"""
+    with timed("dump"):
+      data = self._serialize(result)
+    resp = self._respond(data, 200)
+    if etag is None:
+      etag = '"{}"'.format(sha1(resp.body).hexdigest())
+
+    if etag_matches(request.headers, etag):
+      return response.raw(b"", status = 304, headers = self._etag_headers(etag))
+
+    resp.headers.update(self._etag_headers(etag))
+    return resp
+
+  def _etag_headers(self, etag):
+    headers = {"ETag": etag}
+    vary = self.config.get("ETAG_VARY", ("Authorization",))
+    if vary:
+      headers["Vary"] = ", ".join(vary)
+    return headers
+
+  def _vary_key(self, request):
+    # the body can change by user so the version ETags change with the headers of ETAG_VARY (Authorization by default)
+    if request is None:
+      return ""
+
+    values = "\n".join(request.headers.get(header, "") for header in self.config.get("ETAG_VARY", ("Authorization",)))
+    return sha1(values.encode("utf-8")).hexdigest()[:12]
+
+  def version_etag(self, paper, request = None):
+    """The ETag of the model's stored version (for the request's ETAG_VARY headers), None if it's unknown (the ETag is a hash of the body then)"""
+    return None
+
+  async def bump_version(self, paper, parent = True):
+    """
+    Called (with ETAGS) after a write through the generated routes with the written model (the parent for the factories)
+    Subclasses that keep versions must change the ones of the model and, with parent, of its parent
+    """
+    pass
+
+  async def list_children(self, request, path = "/", member = None):
+    """
+    The children of the member in the order the parent keeps them, PAGE_LIMIT (or limit up to PAGE_MAX_LIMIT) by page
+    The cursor of the next page (after) is the position and the last key (slug or _id) of the page (position:key) and next is null on the last one,
+    when that child is moved or removed meanwhile the page starts after its new place or at its old position
+    With format=ndjson (or Accept: application/x-ndjson) the children are streamed one by line, loading a page at a time
+    """
     if not path.startswith("/"):
       path = "/{}".format(path)
 
-    resp = await self.resolve_path(path, 1)
+    with timed("resolve"):
+      resp = await self._resolve(request, path)
+    paper = resp["model"] if resp else None
+    if paper is None or not self._lists_children(paper.__class__, member):
+      return self._render(*self._not_found("{}/_children/{}".format(path.rstrip("/"), member)))
+
+    self._set_operation("{}/children/{}".format(paper.__class__.__name__ if paper.path else "Root", member))
+    order = [str(key) for key in getattr(paper, member, None) or []]
+    start = 0
+    after = request.args.get("after", None)
+    if after is not None:
+      start = _cursor_start(order, after)
+      if start is None:
+        return self._render(*self._error("{} is not one of the {}".format(after, member), 400))
+
+    max_limit = self.config.get("PAGE_MAX_LIMIT", 1000)
+    try:
+      limit = min(int(request.args.get("limit", self.config.get("PAGE_LIMIT", 100))), max_limit)
+    except ValueError:
+      return self._render(*self._error("limit must be a number", 400))
+    if limit < 1:
+      return self._render(*self._error("limit must be positive", 400))
+
+    if request.args.get("format", None) == "ndjson" or "application/x-ndjson" in request.headers.get("Accept", ""):
+      end = start + limit if "limit" in request.args else len(order)
+
+      async def streaming_fn(resp):
+        for page in range(start, end, max_limit):
+          for child in await self._children_page(paper, member, order[page:min(page + max_limit, end)]):
+            await resp.write(fast_dumps(child) + b"\n")
+
+      return response.stream(streaming_fn, content_type = "application/x-ndjson")
+
+    keys = order[start:start + limit]
+    result = await self._children_page(paper, member, keys)
+    last = start + len(keys) - 1
+    return self._respond({"ok": True, "result": result, "next": "{}:{}".format(last, keys[-1]) if keys and start + limit < len(order) else None}, 200)
+
+  async def _children_page(self, paper, member, keys):
+    """The serialized children of the keys in the same order"""
+    if not keys:
+      return []
+
+    children_model = getattr(self.models, paper.children_models[member])
+    children = children_model(many = True)
+    docs = await self.get_children_docs(paper, member, keys)
+    with timed("load"):
+      if self.trusts(children_model):
+        trusted_load(children, docs, True)
+      else:
+        children.load(docs, many = True)
+    with timed("dump"):
+      return self._serialize(children)
+
+  def trusts(self, model):
+    """If the stored documents of the model are loaded without validation (its trusted_reads or TRUSTED_READS)"""
+    trusted = getattr(model, "trusted_reads", None)
+    return self.config.get("TRUSTED_READS", False) if trusted is None else trusted
+
+  async def _subtree_paper(self, request, path, member, verb):
+    # only the models that can be removed (or updated) through the generated routes can be removed (or moved) as subtrees
+    # and not if the member has permissions since the bulk operation doesn't call it
+    if not path.startswith("/"):
+      path = "/{}".format(path)
 
-    parts = path.split("/")
-    if not resp and len(parts) == 2:
-      root = await self.get_root()
-      resp = {"model": root, "args": parts[1]}
-    elif resp:
-      rest = request.raw_url.decode('utf-8').replace(resp["model"].get_url(), "")
-      if rest:
-        if rest.startswith("/"):
-          rest = rest[1:]
-        if "/" not in rest and rest:
-          resp["args"] = rest
+    with timed("resolve"):
+      resp = await self._resolve(request, path)
+    endpoint = self._dispatch.get((resp["model"].__class__, member, verb)) if resp and resp["model"].path else None
+    if endpoint is not None and "permission" not in getattr(endpoint.method, "__decorators__", {}):
+      self._set_operation("{}/subtree_{}".format(resp["model"].__class__.__name__, member))
+      return resp["model"]
 
-    if resp:
-      paper = resp["model"]
-      default_methods = {"GET": "__call__", "PUT": "update", "DELETE": "remove"}
-      member = resp["args"] if "args" in resp else default_methods[request.method]
+    return None
 
-      method = getattr(paper, member, None)
-      if method is not None and not method.__decorators__.get("notaroute", False):
-        result = await method(request) if iscoroutinefunction(method) else method(request)
-        code = result.code if issubclass(result.__class__, ErrorSchema) else 200
-        result = result.to_plain_dict()
+  async def subtree_remover(self, request, path):
+    """Removes the model and all its descendants at once (DELETE /path/to/the/model/_subtree)"""
+    paper = await self._subtree_paper(request, path, "remove", "DELETE")
+    if paper is None:
+      return self._render(*self._not_found("/{}/_subtree".format(path.strip("/"))))
 
-        result['pref_counter'] = (perf_counter() - counter) * 1000
-        result['process_time'] = (process_time() - time) * 1000
-        return response.json(result, code)
+    with timed("handler"):
+      removed = await self.remove_subtree(paper)
+    return self._respond({"ok": True, "result": {"removed": removed}}, 200)
+
+  async def subtree_mover(self, request, path):
+    """
+    Moves the model and all its descendants under another parent at once (PUT /path/to/the/model/_move)
+    The body is {"to": "/url/of/the/new/parent"} with an optional new "slug"
+    """
+    paper = await self._subtree_paper(request, path, "update", "PUT")
+    if paper is None:
+      return self._render(*self._not_found("/{}/_move".format(path.strip("/"))))
+
+    body = request.json if isinstance(request.json, dict) else {}
+    if not isinstance(body.get("to", None), str) or not isinstance(body.get("slug", ""), str):
+      return self._render(*self._error("The body must be {\"to\": \"/url/of/the/new/parent\"} (and, optionally, the new slug)", 400))
+
+    with timed("handler"):
+      try:
+        url, moved = await self.move_subtree(paper, body["to"], body.get("slug", None))
+      except MoveError as e:
+        return self._render(*self._error(e.message, e.code))
+    return self._respond({"ok": True, "result": {"url": url, "moved": moved}}, 200)
 
+  def _not_found(self, path):
     error = self.models.ErrorSchema()
     error.load({"message": "{} not found".format(path), "code": 404})
-    return response.json(error.to_plain_dict(), 404)
+    return error, 404
 
-  async def generic_options(self, request, *args, **kwargs):
-    return response.text("", status = 204)
+  def _error(self, message, code):
+    error = self.models.ErrorSchema()
+    error.load({"message": message, "code": code})
+    return error, code
+
+  async def _resolve(self, request, path, max_args = 0):
+    """Resolves the path once per batch (the batch operations share their resolutions), as resolve_path otherwise"""
+    resolved = getattr(request, "resolved", None)
+    if resolved is None:
+      resp = await self.resolve_path(path, max_args)
+    else:
+      key = (path, max_args)
+      if key not in resolved:
+        resolved[key] = ensure_future(self.resolve_path(path, max_args))
+      resp = await resolved[key]
+
+    if self.metrics is not None:
+      self.metrics.observe_resolution(resp is not None)
+    return resp
+
+  def _set_operation(self, operation):
+    timings = current_timings.get()
+    if timings is not None and timings.operation is None:
+      timings.operation = operation
+
+  async def batch(self, request):
+    """
+    Runs a list of operations ({"method": ..., "path": ..., "body": ...}) through dispatcher and factory in one request
+    Consecutive reads (GET) run concurrently and share the resolution of their paths, every write runs alone and in order
+    Answers the list of {"method", "path", "code", "body"} in the same order of the operations
+    """
+    operations = request.json
+    if not isinstance(operations, list) or not all(_valid_operation(operation) for operation in operations):
+      return self._render(*self._error("The body must be a list of operations with, at least, the path (the path and the method are strings and the body is an object)", 400))
+
+    max_operations = self.config.get("BATCH_MAX_OPERATIONS", 100)
+    if len(operations) > max_operations:
+      return self._render(*self._error("No more than {} operations by batch".format(max_operations), 400))
+
+    resolved = {}
+    requests = [BatchRequest(request, operation.get("method", "GET"), operation["path"], operation.get("body", None), resolved) for operation in operations]
+    self._set_operation("batch")
+    results = []
+    reads = []
+    for sub_request in requests:
+      if sub_request.method == "GET":
+        reads.append(self._batch_operation(sub_request))
+      else:
+        results.extend(await gather(*reads))
+        reads = []
+        results.append(await self._batch_operation(sub_request))
+        resolved.clear()
+    results.extend(await gather(*reads))
+
+    return self._respond({"ok": True, "result": results}, 200)
+
+  async def _batch_operation(self, request):
+    path = request.path if request.path.startswith("/") else "/{}".format(request.path)
+    try:
+      factory = BATCH_FACTORY.match(path) if request.method == "POST" else None
+      if factory:
+        result, code = await self._factory_result(request, factory.group(1) or "/", factory.group(2))
+      else:
+        result, code, _ = await self._dispatcher_result(request, path)
+    except SanicException as e:
+      # the errors of the client (like the 403 of a permission) are answered as they would be on their own
+      code = e.status_code or 500
+      if code >= 500:
+        self.log.exception(e)
+      result, code = self._error(str(e) if code < 500 else "Internal server error", code)
+    except Exception as e:
+      # the exception can tell about the server so it only goes to the log
+      self.log.exception(e)
+      result, code = self._error("Internal server error", 500)
+
+    return {"method": request.method, "path": path, "code": code, "body": self._serialize(result)}
+
+  def _plain_data(self, result):
+    data = result.get_data()
+    exclude = getattr(result, "exclusions", None)
+    if exclude:
+      data = [dict(element) for element in data] if isinstance(data, list) else dict(data)
+      for element in data if isinstance(data, list) else [data]:
+        for member in exclude:
+          element.pop(member, None)
+
+    return data
+
+  def _serialize(self, result):
+    return self._plain_data(result) if self.config.get("JSON_SERIALIZER", "json") == "fast" else result.to_plain_dict()
+
+  def _respond(self, data, code):
+    with timed("serialize"):
+      if self.config.get("JSON_SERIALIZER", "json") == "fast":
+        return response.raw(fast_dumps(data), status = code, content_type = "application/json")
+
+      return response.json(data, code)
+
+  def _render(self, result, code):
+    """
+    Renders the schema as the JSON response
+    With JSON_SERIALIZER = "fast" the loaded data is serialized straight to bytes (with orjson when available)
+    instead of going through to_plain_dict (dumps + loads) and dumping it again
+    """
+    with timed("dump"):
+      data = self._serialize(result)
+    return self._respond(data, code)
+
+  async def _setup_timing(self, app, loop):
+    if self.config.get("METRICS", False) and self.metrics is None:
+      self.metrics = Metrics()
+      self.add_timing_hook(self._observe_request)
+
+    if not self._timing and (self.config.get("SERVER_TIMING", False) or self.timing_hooks):
+      self.register_middleware(self._start_timings, "request")
+      self.register_middleware(self._finish_timings, "response")
+      self._timing = True
+
+  def add_timing_hook(self, hook):
+    """
+    hook(request, timings) is called (or awaited) with the Timings of every request once its response is ready
+    Use it to export the phases to histograms or logs
+    """
+    self.timing_hooks.append(hook)
+
+  async def _start_timings(self, request):
+    current_timings.set(Timings())
+
+  def _observe_request(self, request, timings):
+    operation = timings.operation or getattr(request, "uri_template", None) or "unmatched"
+    self.metrics.observe_request(operation, request.method, timings.status, timings.total(), timings.count("mongo"))
+
+  def _metrics_gauges(self):
+    return {}
+
+  def _metrics_endpoints(self):
+    self._route_adder("", "/_metrics", "GET", self._metrics_endpoint)
+
+  async def _metrics_endpoint(self, request):
+    if self.metrics is None:
+      return response.text("Set METRICS to True in the config", status = 404)
+
+    return response.text(self.metrics.render(self._metrics_gauges()), content_type = "text/plain; version=0.0.4; charset=utf-8")
+
+  async def _finish_timings(self, request, response):
+    timings = current_timings.get()
+    if timings is None:
+      return
+
+    timings.status = response.status
+    if self.config.get("SERVER_TIMING", False):
+      response.headers["Server-Timing"] = timings.header()
+
+    for hook in self.timing_hooks:
+      result = hook(request, timings)
+      if iscoroutinefunction(hook):
+        await result
+
+  def _url_of(self, paper):
+    return paper.get_url() if paper.path else "/"
+
+  def invalidate(self, url, subtree = False):
+    """
+    Called after a write through the generated routes with the url of the written model
+    Subclasses that keep copies of the models must forget them here
+    """
+    pass
 
   async def notify(self, notification, request, data):
     if hasattr(self, notification):
@@ -418,77 +1215,627 @@ class ySanic(Sanic):
     else:
       self.log.info("{}: {}".format(notification, data))
 
+  async def _start_mailer(self, app, loop):
+    if not self.config.get("DEBUG_EMAILS", False):
+      self._mailer = Mailer(self.config, self.log)
+      self._mailer.start()
+
+  async def _stop_mailer(self, app, loop):
+    if self._mailer is not None:
+      await self._mailer.stop(self.config.get("MAIL_DRAIN_TIMEOUT", 10))
+      self._mailer = None
+
+  def _mail_message(self, to, subject, html):
+    msg = MIMEText(html, 'html')
+    msg["From"] = self.config["SMTP_SENDER"]
+    msg["To"] = to
+    msg["Subject"] = subject
+    return msg
+
+  def _debug_mail(self, to, subject, text, html):
+    self.log.info(f"to: {to}")
+    self.log.info(f"subject: {subject}")
+    self.log.info(f"text: {text}")
+    self.log.info(f"html: {html}")
+
+    filename = self.config.get("DEBUG_EMAILS_FILE", None)
+    if filename:
+      with open(filename, "a") as f:
+        f.write("{}\n\n".format(self._mail_message(to, subject, html or text).as_string()))
+
   def send_mail(self, to, subject, text = None, html = None):
+    """
+    Queues the email to be sent by the mailer without blocking the loop (raises asyncio.QueueFull if the queue is full)
+    and returns the future of its delivery: await it to know it was sent (it raises the error of the last attempt otherwise)
+    Out of the server (no mailer running) it's sent from the executor, or right away when there's no loop running
+    """
     if self.config.get("DEBUG_EMAILS", False):
-      self.log.info(f"to: {to}")
-      self.log.info(f"subject: {subject}")
-      self.log.info(f"text: {text}")
-      self.log.info(f"html: {html}")
-    else:
-      msg = MIMEText(html, 'html')
-      msg["From"] = self.config["SMTP_SENDER"]
-      msg["To"] = to
-      msg["Subject"] = subject
+      self._debug_mail(to, subject, text, html)
+      return None
 
-      # server = SMTP("{}:{}".format(self.config["SMTP_SERVER"], self.config.get("SMTP_PORT", 587)))
+    msg = self._mail_message(to, subject, html)
+    if self._mailer is not None:
+      return self._mailer.send(to, msg)
 
-      server = SMTP_SSL(self.config["SMTP_SERVER"], self.config.get("SMTP_PORT", 587))
-      if self.config.get("SMTP_TLS", False):
-        server.starttls()
-      else:
-        server.ehlo()
-      server.login(self.config.get("SMTP_SENDER_LOGIN", self.config["SMTP_SENDER"]), self.config["SMTP_SENDER_PASSWORD"])
-      server.sendmail(self.config["SMTP_SENDER"], to, msg.as_string())
-      server.quit()
+    mailer = Mailer(self.config, self.log)
+    try:
+      loop = get_running_loop()
+    except RuntimeError:
+      mailer.send_now(to, msg)
+      return None
+
+    return loop.run_in_executor(None, mailer.send_now, to, msg)
+
+  async def queue_mail(self, to, subject, text = None, html = None, wait = False):
+    """
+    Like send_mail but waits for room in the queue instead of failing when it's full
+    With wait it also waits for the delivery (raising the error of the last attempt)
+    """
+    if self.config.get("DEBUG_EMAILS", False) or self._mailer is None:
+      delivery = self.send_mail(to, subject, text, html)
+    else:
+      delivery = await self._mailer.put(to, self._mail_message(to, subject, html))
+
+    if wait and delivery is not None:
+      await delivery
+    return delivery
 
   async def allow_origin(self, request, response):
-      response.headers["Access-Control-Allow-Origin"] = "*"
-      response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
-      response.headers["Access-Control-Allow-Headers"] = "Access-Control-Allow-Origin, Access-Control-Allow-Headers, Origin, X-Requested-With, Content-Type, Authorization"
+      response.headers.update(CORS_HEADERS)
+
+REQUEST_ID = re.compile(r"^[\w.:-]{1,64}$")
 
 class MongoySanic(ySanic):
   def __init__(self, models, **kwargs):
     table = kwargs.pop("table", None)
+    self._table = None
+    self._replicas = None
+    self._profiles = None
     if table is not None:
       self.table = table
+    self.mongo_client = None
+    self.database = None
+    self._cache = None
+    self._transactions = None
+    self._root = None
+    self._root_loaded_at = None
+    self._invalidations = 0
     super().__init__(models, **kwargs)
 
-  async def get_root(self):
-    doc = await self.table.find_one({"path": ""})
-    if doc:
-      model = getattr(self.models, doc["type"])(self.table)
-      model.load(doc)
-      errors = model.get_errors()
-      if errors:
-        raise InvalidUsage(errors)
-      else:
+    self.register_listener(self._setup_mongo, "before_server_start")
+    self.register_listener(self._stop_mongo, "after_server_stop")
+    self.register_listener(self._setup_cache, "before_server_start")
+    self.register_listener(self._setup_root, "before_server_start")
+    self.register_listener(self._setup_indexes, "before_server_start")
+    # once every before_server_start listener (like the ones of sanic_mongo's GridFS) is done
+    self.register_listener(self._setup_gridfs_indexes, "after_server_start")
+    self.register_listener(self._setup_profiler, "before_server_start")
+
+  @property
+  def table(self):
+    if replicas.current.get() and self._table is not None:
+      return self._replica_table()
+    return self._table
+
+  @table.setter
+  def table(self, table):
+    self._table = self._profiled(table)
+    self._replicas = None
+
+  def _replica_table(self):
+    # the table with the read preference of READ_REPLICAS, the writes go to the primary anyway
+    if self._replicas is None:
+      table = self._table.table if isinstance(self._table, ProfiledTable) else self._table
+      preference = replicas.read_preference(self.config["READ_REPLICAS"], self.config.get("READ_MAX_STALENESS", None))
+      self._replicas = self._profiled(table.with_options(read_preference = preference))
+    return self._replicas
+
+  def _profiled(self, table):
+    # with PROFILE every table the app gets (at once or by request) records its queries
+    if self._profiles is not None and table is not None and not isinstance(table, ProfiledTable):
+      table = ProfiledTable(table, self.config.get("DEBUG", False))
+    return table
+
+  async def _setup_mongo(self, app, loop):
+    """
+    Connects once per worker (a client can't be shared by processes) to MONGO_URI and takes the table (MONGO_TABLE) of the database (MONGO_DB or the one in the URI, one of them is required)
+    The pool, read preference and write concern are MONGO_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_READ_PREFERENCE and MONGO_WRITE_CONCERN (like {"w": "majority"}), any other option of the client goes in MONGO_OPTIONS
+    Nothing is done if the app got its table or there is no MONGO_URI
+    """
+    uri = self.config.get("MONGO_URI", None)
+    if self._table is not None or not uri or self.mongo_client is not None:
+      return
+
+    options = dict(self.config.get("MONGO_OPTIONS", {}))
+    options["maxPoolSize"] = self.config.get("MONGO_POOL_SIZE", 100)
+    options["minPoolSize"] = self.config.get("MONGO_MIN_POOL_SIZE", 0)
+    options["readPreference"] = self.config.get("MONGO_READ_PREFERENCE", "primary")
+    options.update(self.config.get("MONGO_WRITE_CONCERN", {}))
+
+    # only the apps that connect by themselves need motor
+    from motor.motor_asyncio import AsyncIOMotorClient
+    self.mongo_client = AsyncIOMotorClient(uri, **options)
+    name = self.config.get("MONGO_DB", None)
+    self.database = self.mongo_client.get_database(name) if name else self.mongo_client.get_default_database()
+    self.table = self.database[self.config.get("MONGO_TABLE", "tree")]
+
+  async def _stop_mongo(self, app, loop):
+    if self.mongo_client is not None:
+      self.mongo_client.close()
+      self.mongo_client = None
+      self.database = None
+      self.table = None
+
+  async def _setup_cache(self, app, loop):
+    size = self.config.get("CACHE_SIZE", 0)
+    if size and self._cache is None:
+      self._cache = TTLCache(size, self.config.get("CACHE_TTL", None))
+
+  async def _setup_root(self, app, loop):
+    self._root = None
+    if self.config.get("ROOT_CACHE", False) and getattr(self, "table", None) is not None:
+      try:
+        await self.get_root()
+      except NotFound:
+        pass
+
+  async def _setup_indexes(self, app, loop):
+    # before serving, so a unique index is there before the first write
+    if getattr(self, "table", None) is not None:
+      await self.ensure_indexes(gridfs = False)
+
+  async def _setup_gridfs_indexes(self, app, loop):
+    if hasattr(self, "GridFS"):
+      await self.ensure_gridfs_indexes()
+
+  async def _create_index(self, collection, index, replaced = None):
+    try:
+      if replaced is not None:
+        # a non unique index with the same keys (and name) doesn't let the unique one be created
+        await collection.drop_index(replaced)
+      await collection.create_index(list(index.keys), unique = index.unique)
+    except OperationFailure as e:
+      self.log.error("The index {} of {} ({}) couldn't be created: {}".format(list(index.keys), collection.name, index.reason, e))
+      if replaced is not None:
+        # the documents are not unique yet so the old one is put back
+        await collection.create_index(list(index.keys))
+
+  async def _ensure(self, collection, required, shapes):
+    if self.config.get("ENSURE_INDEXES", True):
+      existing = {tuple(info["key"]): (name, info.get("unique", False)) for name, info in (await collection.index_information()).items()}
+      for index in required:
+        name, unique = existing.get(tuple(index.keys), (None, False))
+        # a unique index serves as a non unique one too
+        if name is None or (index.unique and not unique):
+          await self._create_index(collection, index, name)
+
+    missing = indexes.uncovered(shapes, await collection.index_information())
+    for shape in missing:
+      self.log.warning("No index of {} covers the queries on {} ({}), they will scan the whole collection".format(collection.name, shape.fields, shape.origin))
+    return missing
+
+  async def ensure_indexes(self, table = None, gridfs = True):
+    """
+    Creates the indexes the queries of ySanic and the models need ((path, slug), unique with UNIQUE_PATHS, the email fields and the ones with index or unique) in table (the app's one by default)
+    and the GridFS ones when the app has GridFS (and gridfs is True); with ENSURE_INDEXES = False they are only checked
+    Logs and answers the query shapes no index covers
+    """
+    table = table if table is not None else self.table
+    required = indexes.model_indexes(self._checkings, self.config.get("UNIQUE_PATHS", False))
+    missing = await self._ensure(table, required, indexes.query_shapes(self._checkings))
+
+    if gridfs and hasattr(self, "GridFS"):
+      missing.extend(await self.ensure_gridfs_indexes())
+
+    return missing
+
+  async def ensure_gridfs_indexes(self):
+    """Like ensure_indexes for the files and chunks of the app's GridFS"""
+    missing = []
+    bucket = self._fs().collection
+    for name in ("files", "chunks"):
+      missing.extend(await self._ensure(bucket[name], indexes.GRIDFS_INDEXES[name], indexes.GRIDFS_QUERIES[name]))
+
+    return missing
+
+  def _path_key(self, path):
+    path = PurePath(path)
+    return (str(path.parent), path.name) if path.name else ("", "")
+
+  def invalidate(self, url, subtree = False):
+    """
+    Forgets the model of the url (and its descendants with subtree) and its parent in the request's identity map, the documents cache and the root memo
+    The generated routes call it after their writes; a handler that writes straight to the table must call it with the urls it wrote
+    """
+    # the reads in flight when it's called don't keep what they get (it could be from before the write)
+    self._invalidations += 1
+    key = self._path_key(url)
+    if key == ("", "") or key[0] == "/":
+      self._root = None
+
+    identities = current_identity_map.get()
+    if identities is not None:
+      parent = self._path_key(PurePath(url).parent) if key != ("", "") else key
+      prefix = "{}/".format(url)
+      identities.evict(lambda other: other in (key, parent) or (subtree and (other[0] == url or other[0].startswith(prefix))))
+
+    if self._cache is None:
+      return
+
+    self._cache.pop(key)
+    if key != ("", ""):
+      self._cache.pop(self._path_key(PurePath(url).parent))
+    if subtree:
+      prefix = "{}/".format(url)
+      self._cache.evict(lambda key: key[0] == url or key[0].startswith(prefix))
+
+  def cache_stats(self):
+    return self._cache.stats() if self._cache is not None else None
+
+  def _debug_endpoints(self):
+    super()._debug_endpoints()
+    self._route_adder("", "/_cache_stats", "GET", self._cache_stats_endpoint)
+    self._route_adder("", "/_profile/<request_id>", "GET", self._profile_endpoint)
+
+  async def _setup_profiler(self, app, loop):
+    if self.config.get("PROFILE", False) and self._profiles is None:
+      self._profiles = TTLCache(self.config.get("PROFILE_SIZE", 100), self.config.get("PROFILE_TTL", None))
+      self.table = self._table
+      self.register_middleware(self._start_profile, "request")
+      self.register_middleware(self._finish_profile, "response")
+
+  async def _start_profile(self, request):
+    # the id is the server's so a client can't overwrite or read the profile of another request by sending its id,
+    # the client's (if valid) is kept in the profile to match it with its logs
+    request_id = uuid4().hex
+    client_id = request.headers.get("X-Request-Id", "")
+    request.ctx.request_id = request_id
+    current_profile.set(Profile(request_id, request.method, request.path, client_id if REQUEST_ID.match(client_id) else None))
+
+  async def _finish_profile(self, request, response):
+    profile = current_profile.get()
+    if profile is not None:
+      await profile.finish()
+      response.headers["X-Request-Id"] = profile.request_id
+      self._profiles.set(profile.request_id, profile.to_dict())
+
+  def profile(self, request_id):
+    """The queries of the request (by the X-Request-Id of its response) while it's kept (PROFILE_SIZE, PROFILE_TTL), None otherwise"""
+    return self._profiles.get(request_id) if self._profiles is not None else None
+
+  async def _profile_endpoint(self, request, request_id):
+    profile = self.profile(request_id)
+    if profile is None:
+      return response.text("Set PROFILE to True in the config" if self._profiles is None else "{} not found".format(request_id), status = 404)
+
+    return response.raw(fast_dumps(profile), content_type = "application/json")
+
+  async def _cache_stats_endpoint(self, request):
+    return response.json(self.cache_stats())
+
+  def _metrics_gauges(self):
+    gauges = super()._metrics_gauges()
+    stats = self.cache_stats()
+    if stats is not None:
+      gauges["ysanic_cache_hits"] = ("Hits of the documents cache", stats["hits"])
+      gauges["ysanic_cache_misses"] = ("Misses of the documents cache", stats["misses"])
+      gauges["ysanic_cache_hit_ratio"] = ("Hit ratio of the documents cache", stats["ratio"])
+      gauges["ysanic_cache_size"] = ("Documents in the cache", stats["size"])
+
+    return gauges
+
+  def _paper_from_doc(self, doc, trusted = False):
+    identities = current_identity_map.get()
+    if identities is not None:
+      model = identities.get_by_id(doc.get("_id", None))
+      if model is not None:
         return model
-    else:
+
+    model_class = getattr(self.models, doc["type"])
+    with timed("load"):
+      if trusted or self.trusts(model_class):
+        model = self._trusted_paper(model_class, doc)
+      else:
+        model = model_class(self.table)
+        model.load(doc)
+    errors = model.get_errors()
+    if errors:
+      raise InvalidUsage(errors)
+
+    model._stored_version = doc.get(self.config.get("VERSION_FIELD", "_v"), 0)
+    if identities is not None:
+      identities.add(self._doc_key(doc), model)
+    return model
+
+  def _trusted_paper(self, model_class, doc):
+    model = model_class(self.table)
+    trusted_load(model, doc)
+    return model
+
+  def version_etag(self, paper, request = None):
+    """
+    The ETag of the stored version (VERSION_FIELD, _v by default) of the model, its _id, its URL (a move changes the URL but not the version)
+    and the request's ETAG_VARY headers (the body can change by user)
+    It's only right if every write goes through ySanic (or increments the version too)
+    """
+    version = getattr(paper, "_stored_version", None)
+    if version is None or "_id" not in paper.get_data():
+      return None
+
+    key = "{}:{}:{}".format(self._url_of(paper), self.config.get("JSON_SERIALIZER", "json"), self._vary_key(request))
+    return '"{}-{}-{}"'.format(paper._id, version, sha1(key.encode("utf-8")).hexdigest()[:12])
+
+  async def bump_version(self, paper, parent = True):
+    queries = [{"_id": paper._id}]
+    if parent and paper.path:
+      key = self._path_key(paper.path)
+      queries.append({"path": ""} if key == ("", "") else {"path": key[0], "slug": key[1]})
+
+    with timed("mongo"):
+      await self.table.update_many({"$or": queries} if len(queries) > 1 else queries[0], {"$inc": {self.config.get("VERSION_FIELD", "_v"): 1}})
+
+  async def get_root(self):
+    """
+    The root model, the same one of the request's identity map (the one "/" resolves to)
+    With ROOT_CACHE the root's document is kept by the worker and every request loads its own model of it without validation
+    (it was validated when it was read) instead of asking the table
+    It is reloaded when it's written through this worker or, if ROOT_REFRESH_INTERVAL is set, when it gets older than that:
+    the other workers don't know about that write so they keep theirs until then
+    """
+    identities = current_identity_map.get()
+    root = identities.get(("", "")) if identities is not None else None
+    if root is not None:
+      return root
+
+    if self._root is not None:
+      interval = self.config.get("ROOT_REFRESH_INTERVAL", None)
+      if not interval or monotonic() - self._root_loaded_at < interval:
+        return self._paper_from_doc(deepcopy(self._root), trusted = True)
+
+    invalidations = self._invalidations
+    doc = await self._load_root()
+    # what a secondary answers could be stale so it's not kept and the handlers can change the loaded document so the memo is a copy
+    if self.config.get("ROOT_CACHE", False) and not replicas.current.get() and invalidations == self._invalidations:
+      self._root, self._root_loaded_at = deepcopy(doc), monotonic()
+
+    return self._paper_from_doc(doc)
+
+  async def _load_root(self):
+    doc = self._cache.get(("", "")) if self._cache is not None else None
+    if doc is None:
+      version = self._cache.version if self._cache is not None else None
+      with timed("mongo"):
+        doc = await self.table.find_one({"path": ""})
+      if doc and self._cache is not None and not replicas.current.get():
+        self._cache.set(("", ""), doc, version)
+
+    if not doc:
       raise NotFound("root not found")
 
+    return doc
+
   async def get_path(self, path):
     result = await self.get_paths([path])
     return result[0] if isinstance(result, list) else result
 
   async def get_paths(self, paths):
-    purePaths = []
-    for path in paths:
-      path = PurePath(path)
-      purePaths.append({"path": str(path.parent), "slug": path.name})
+    keys = [self._path_key(path) for path in paths]
+    found = await self._find_docs(keys)
+    if len(keys) == 1:
+      return found.get(keys[0], None)
 
-    result = await self.table.find_one(purePaths[0]) if len(purePaths) == 1 else await self.table.find({"$or": purePaths}).to_list(None)
-    return result
+    return [found[key] for key in dict.fromkeys(keys) if key in found]
+
+  def _doc_key(self, doc):
+    return ("", "") if doc["path"] == "" else (doc["path"], doc["slug"])
+
+  async def _find_docs(self, keys):
+    """
+    The documents of the (path, slug) keys as {key: document} (the ones that don't exist are not there)
+    The cached ones are taken from the cache and the rest is asked with a single query
+    """
+    found = {}
+    missing = []
+    identities = current_identity_map.get()
+    for key in dict.fromkeys(keys):
+      model = identities.get(key) if identities is not None else None
+      if model is not None:
+        found[key] = dict(model.get_data())
+        continue
+
+      doc = self._cache.get(key) if self._cache is not None else None
+      if doc is None:
+        missing.append(key)
+      else:
+        found[key] = doc
+
+    if missing:
+      queries = [{"path": ""} if key == ("", "") else {"path": key[0], "slug": key[1]} for key in missing]
+      version = self._cache.version if self._cache is not None else None
+      with timed("mongo"):
+        docs = [await self.table.find_one(queries[0])] if len(queries) == 1 else await self.table.find({"$or": queries}).to_list(None)
+      for doc in docs:
+        if doc:
+          key = self._doc_key(doc)
+          found[key] = doc
+          if self._cache is not None and not replicas.current.get():
+            self._cache.set(key, doc, version)
+
+    return found
+
+  async def get_paper_by_id(self, _id):
+    """The model with the _id (an ObjectId or its string)"""
+    _id = ObjectId(_id) if isinstance(_id, str) else _id
+    identities = current_identity_map.get()
+    model = identities.get_by_id(_id) if identities is not None else None
+    if model is not None:
+      return model
+
+    with timed("mongo"):
+      doc = await self.table.find_one({"_id": _id})
+    if doc:
+      return self._paper_from_doc(doc)
+    else:
+      raise NotFound("{} not found".format(_id))
+
+  async def get_papers(self, paths):
+    """The models of the paths, in the same order and None for the ones that don't exist, with one query at most"""
+    keys = [self._path_key(path) for path in paths]
+    found = await self._find_docs(keys)
+    return [self._paper_from_doc(found[key]) if key in found else None for key in keys]
+
+  async def ancestors_of(self, paper):
+    """The ancestors of the model from the root to its parent (the missing ones are skipped) with one query at most"""
+    urls = []
+    path = PurePath(paper.path) if paper.path else None
+    while path is not None:
+      urls.insert(0, str(path))
+      path = path.parent if path.name else None
+
+    return [ancestor for ancestor in await self.get_papers(urls) if ancestor is not None]
+
+  async def siblings_of(self, paper):
+    """The other children of the model's parent"""
+    if not paper.path:
+      return []
+
+    with timed("mongo"):
+      docs = await self.table.find({"path": paper.path, "_id": {"$ne": paper._id}}).to_list(None)
+    return [self._paper_from_doc(doc) for doc in docs]
+
+  async def _supports_transactions(self):
+    supported = self.config.get("TRANSACTIONS", None)
+    if supported is None:
+      if self._transactions is None:
+        try:
+          info = await self.table.database.client.admin.command("ismaster")
+          self._transactions = "setName" in info or info.get("msg", None) == "isdbgrid"
+        except PyMongoError:
+          self._transactions = False
+      supported = self._transactions
+
+    return supported
+
+  async def _in_transaction(self, operation):
+    """
+    Awaits operation(session) inside a transaction when the server has them (a replica set or a sharded cluster), with None as session otherwise
+    TRANSACTIONS in the config skips asking the server
+    """
+    if not await self._supports_transactions():
+      return await operation(None)
+
+    async with await self.table.database.client.start_session() as session:
+      async with session.start_transaction():
+        return await operation(session)
+
+  def _subtree_query(self, url):
+    return {"path": {"$regex": "^{}(/|$)".format(re.escape(url))}}
+
+  def _child_key(self, parent, member, paper, slug = None):
+    # the lists of children keep the _id or the slug
+    return paper._id if isinstance(parent.fields[member].container, yObjectId) else slug or paper.slug
+
+  async def _parent_pull(self, paper):
+    # the parent and what has to be pulled from its lists of children (nothing if the parent is gone)
+    try:
+      parent = await self.get_paper(paper.path)
+    except NotFound:
+      return None, {}
+
+    return parent, {member: self._child_key(parent, member, paper) for member in parent.children_of_type(paper.__class__.__name__)}
+
+  async def remove_subtree(self, paper):
+    """
+    Removes the model and all its descendants with one delete_many and takes it out of its parent's lists of children, in a transaction if possible
+    Answers how many documents were removed
+    """
+    url = self._url_of(paper)
+    parent, pull = await self._parent_pull(paper)
+
+    async def operation(session):
+      with timed("mongo"):
+        result = await self.table.delete_many({"$or": [{"_id": paper._id}, self._subtree_query(url)]}, session = session)
+        if pull:
+          await self.table.update_one({"_id": parent._id}, {"$pull": pull}, session = session)
+      return result.deleted_count
+
+    removed = await self._in_transaction(operation)
+    if parent is not None and self.config.get("ETAGS", False):
+      await self.bump_version(parent, False)
+    self.invalidate(url, True)
+    return removed
+
+  async def move_subtree(self, paper, to, slug = None):
+    """
+    Moves the model and all its descendants under the model of the url to (with another slug if it's given)
+    The paths of the descendants are rewritten with one update_many and the lists of children of both parents are updated, in a transaction if possible
+    Answers the new url of the model and how many documents were moved (raises MoveError if it can't be moved there)
+    """
+    url = self._url_of(paper)
+    if slug is not None:
+      if "/" in slug or not slugify(slug):
+        raise MoveError("{} is not a valid slug".format(slug))
+      slug = slugify(slug)
+    slug = slug or paper.slug
+    to = "/{}".format(to.strip("/")) if to.strip("/") else "/"
+    new_url = "{}/{}".format("" if to == "/" else to, slug)
+    if to == url or to.startswith("{}/".format(url)):
+      raise MoveError("{} can't be moved inside itself".format(url))
+
+    try:
+      new_parent = await self.get_paper(to)
+    except NotFound:
+      raise MoveError("{} not found".format(to), 404)
+
+    push_to = new_parent.children_of_type(paper.__class__.__name__)
+    if not push_to:
+      raise MoveError("{} can't have children of type {}".format(to, paper.__class__.__name__))
+    if new_url == url:
+      return url, 0
+    if await self.get_path(new_url):
+      raise MoveError("{} already exists".format(new_url), 409)
+
+    parent, pull = await self._parent_pull(paper)
+    push = {push_to[0]: self._child_key(new_parent, push_to[0], paper, slug)}
+    path = {"$concat": [new_url, {"$substrCP": ["$path", len(url), {"$strLenCP": "$path"}]}]}
+
+    async def operation(session):
+      with timed("mongo"):
+        result = await self.table.update_many(self._subtree_query(url), [{"$set": {"path": path}}], session = session)
+        await self.table.update_one({"_id": paper._id}, {"$set": {"path": to, "slug": slug}}, session = session)
+        if pull:
+          await self.table.update_one({"_id": parent._id}, {"$pull": pull}, session = session)
+        await self.table.update_one({"_id": new_parent._id}, {"$push": push}, session = session)
+      return result.modified_count + 1
+
+    moved = await self._in_transaction(operation)
+    if self.config.get("ETAGS", False):
+      await self.bump_version(paper)
+      await self.bump_version(new_parent, False)
+    self.invalidate(url, True)
+    self.invalidate(new_url, True)
+    return new_url, moved
+
+  async def get_children_docs(self, paper, member, keys):
+    """The documents of the member's children with the keys (slugs or _ids as strings) in the order of the keys"""
+    container = paper.fields[member].container
+    if isinstance(container, yObjectId):
+      query = {"_id": {"$in": [ObjectId(key) for key in keys]}}
+      key_of = lambda doc: str(doc["_id"])
+    else:
+      query = {"path": self._url_of(paper), "slug": {"$in": keys}, "type": paper.children_models[member]}
+      key_of = lambda doc: doc["slug"]
+
+    with timed("mongo"):
+      docs = await self.table.find(query).to_list(None)
+
+    found = {key_of(doc): doc for doc in docs}
+    return [found[key] for key in keys if key in found]
 
   async def get_paper(self, path):
     doc = await self.get_path(path)
     if doc:
-      model = getattr(self.models, doc["type"])(self.table)
-      model.load(doc)
-      errors = model.get_errors()
-      if errors:
-        raise InvalidUsage(errors)
-      else:
-        return model
+      return self._paper_from_doc(doc)
     else:
       raise NotFound("{} not found".format(path))
 
@@ -498,6 +1845,8 @@ class MongoySanic(ySanic):
     if path.name == "":
       paper = await self.get_root()
       return {"model": paper}
+    elif self.config.get("RESOLVE_SINGLE_QUERY", False):
+      return await self._resolve_path_at_once(path, max_args)
     else:
       while path.name != "":
         try:
@@ -522,25 +1871,166 @@ class MongoySanic(ySanic):
 
         path = path.parent
 
+  async def _resolve_path_at_once(self, path, max_args = 0):
+    """
+    Resolves the path with a single query
+    Every candidate (the path itself and up to max_args ancestors) is asked at once and the deepest match wins
+    The args follow the same rules (and order) than the step by step resolution
+    """
+    candidates = []
+    while path.name != "" and len(candidates) <= max_args:
+      candidates.append(path)
+      path = path.parent
+
+    docs = await self.get_paths(candidates)
+    if not docs:
+      return None
+    if isinstance(docs, dict):
+      docs = [docs]
+
+    found = {(doc["path"], doc["slug"]): doc for doc in docs}
+    for depth, candidate in enumerate(candidates):
+      doc = found.get((str(candidate.parent), candidate.name))
+      if doc:
+        result = {"model": self._paper_from_doc(doc)}
+        args = [arg.name for arg in candidates[:depth]]
+        if args:
+          result["args"] = args[0] if max_args == 1 else args
+        return result
+
+    return None
+
+  def _fs(self):
+    return self.GridFS[self.config.get("GRIDFS_BUCKET", "test_fs")]
+
+  async def open_file(self, filename):
+    """Opens the newest revision of the file without reading its content"""
+    try:
+      return await self._fs().open_download_stream_by_name(filename)
+    except NoFile:
+      raise NotFound(filename)
+
   async def get_file(self, filename):
-    cursor = self.GridFS["test_fs"].find({"filename": filename})
+    file = await self.open_file(filename)
+    return {"stream": await file.read(), "contentType": file.metadata["contentType"]}
+
+  async def iter_file(self, file, start = 0, end = None):
+    """Yields the content of an opened file from start to end (both included) chunk by chunk"""
+    if start:
+      file.seek(start)
+
+    remaining = (file.length if end is None else end + 1) - start
+    chunk_size = self.config.get("GRIDFS_CHUNK_SIZE", None) or file.chunk_size
+    while remaining > 0:
+      chunk = await file.read(min(chunk_size, remaining))
+      if not chunk:
+        break
+      remaining -= len(chunk)
+      yield chunk
+
+  async def file_response(self, request, filename, headers = None):
+    """
+    Streams the newest revision of the file with support for Range requests and ETag/Last-Modified validation
+    The ETag is the GridFS id of the revision since a GridFS file never changes once it's written
+    """
+    try:
+      file = await self.open_file(filename)
+    except NotFound:
+      error = self.models.ErrorSchema()
+      error.load({"message": "{} not found".format(filename), "code": 404})
+      return response.json(error.to_plain_dict(), 404)
 
-    stream = None
-    content_type = None
-    async for file in cursor:
-      content_type = file.metadata["contentType"]
-      stream = await file.read()
+    etag = '"{}"'.format(file._id)
+    modified = file.upload_date.replace(tzinfo = timezone.utc)
+    headers = dict(headers or {}, **{"ETag": etag, "Last-Modified": format_datetime(modified, usegmt = True), "Accept-Ranges": "bytes"})
 
-    if stream is None and content_type is None:
-      raise NotFound(filename)
+    if not_modified(request.headers, etag, modified):
+      return response.raw(b"", status = 304, headers = headers)
+
+    start, end, status = 0, file.length - 1, 200
+    range_header = request.headers.get("Range")
+    if range_header and file.length and request.headers.get("If-Range", etag) == etag:
+      requested = byte_range(range_header, file.length)
+      if requested is None:
+        headers["Content-Range"] = "bytes */{}".format(file.length)
+        return response.raw(b"", status = 416, headers = headers)
+
+      start, end = requested
+      if (start, end) != (0, file.length - 1):
+        status = 206
+        headers["Content-Range"] = "bytes {}-{}/{}".format(start, end, file.length)
+
+    headers["Content-Length"] = str(max(end - start + 1, 0))
 
-    return {"stream": stream, "contentType": content_type}
+    async def streaming_fn(resp):
+      async for chunk in self.iter_file(file, start, end):
+        await resp.write(chunk)
+
+    content_type = (file.metadata or {}).get("contentType", "application/octet-stream")
+    return response.stream(streaming_fn, status = status, headers = headers, content_type = content_type, chunked = False)
 
   async def set_file(self, filename, data, contentType):
-    await self.GridFS["test_fs"].upload_from_stream(filename, data, metadata = {"contentType": contentType})
+    await self._fs().upload_from_stream(filename, data, metadata = {"contentType": contentType})
+
+  async def _iter_stream(self, stream):
+    if hasattr(stream, "read"):
+      while True:
+        chunk = await stream.read()
+        if chunk is None:
+          break
+        yield chunk
+    else:
+      async for chunk in stream:
+        yield chunk
+
+  async def set_file_stream(self, filename, stream, contentType, chunk_size = None):
+    """
+    Pipes a stream (the request.stream of a route added with stream = True or any async iterable of bytes) into GridFS
+    Only one chunk is kept in memory (chunk_size, GRIDFS_CHUNK_SIZE or the GridFS default)
+    The sha256 of the content is computed on the fly and saved in the file document
+    If the newest revision of the file has the same content the new one is discarded
+    """
+    fs = self._fs()
+    chunk_size = chunk_size or self.config.get("GRIDFS_CHUNK_SIZE", None)
+    options = {"metadata": {"contentType": contentType}}
+    if chunk_size:
+      options["chunk_size_bytes"] = chunk_size
+
+    grid_in = fs.open_upload_stream(filename, **options)
+    digest = sha256()
+    try:
+      async for chunk in self._iter_stream(stream):
+        digest.update(chunk)
+        await grid_in.write(chunk)
+    except BaseException:
+      await grid_in.abort()
+      raise
+
+    content_hash = digest.hexdigest()
+    await grid_in.set("sha256", content_hash)
+    await grid_in.close()
+
+    result = {"_id": grid_in._id, "sha256": content_hash, "length": grid_in.length, "duplicate": False}
+    async for previous in fs.find({"filename": filename, "_id": {"$ne": grid_in._id}}, sort = [("uploadDate", -1)], limit = 1):
+      if getattr(previous, "sha256", None) == content_hash:
+        await fs.delete(grid_in._id)
+        result.update({"_id": previous._id, "duplicate": True})
+
+    return result
 
   async def set_table(self, request):
-    request.app.table = request.app.mongo["test"][request.app.config.get("MONGO_TABLE")]
+    """
+    Request middleware of the apps that connect with sanic_mongo (MONGO_CONNECTION is the name of the connection, test by default),
+    the ones with MONGO_URI get their table once per worker at startup
+    """
+    request.app.table = request.app.mongo[request.app.config.get("MONGO_CONNECTION", "test")][request.app.config.get("MONGO_TABLE")]
+
+  async def set_identity_map(self, request):
+    """
+    Request middleware that gives every request its own identity map
+    While the request lasts the models loaded by ySanic (by path or _id) are loaded once and shared, the writes through the generated routes evict them
+    """
+    current_identity_map.set(IdentityMap())
 
 def notaroute(when = None, description = None):
   def decorator(func):
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from copy import deepcopy
+from time import monotonic
+
+class TTLCache:
+  """
+  A LRU cache whose entries expire after ttl seconds (never if ttl is falsy)
+  Values are copied on the way in and on the way out so callers can't change what is cached
+  version changes with every pop, evict and clear: a value read before one of them (its version is older) is not set afterwards
+  """
+  def __init__(self, size = 1024, ttl = None):
+    self.size = size
+    self.ttl = ttl
+    self.hits = 0
+    self.misses = 0
+    self.version = 0
+    self._data = OrderedDict()
+
+  def __len__(self):
+    return len(self._data)
+
+  def __contains__(self, key):
+    return key in self._data
+
+  def get(self, key, default = None):
+    entry = self._data.get(key)
+    if entry is not None:
+      value, expires = entry
+      if expires is None or expires > monotonic():
+        self._data.move_to_end(key)
+        self.hits += 1
+        return deepcopy(value)
+
+      del self._data[key]
+
+    self.misses += 1
+    return default
+
+  def set(self, key, value, version = None):
+    if version is not None and version != self.version:
+      return
+
+    self._data[key] = (deepcopy(value), monotonic() + self.ttl if self.ttl else None)
+    self._data.move_to_end(key)
+    while len(self._data) > self.size:
+      self._data.popitem(last = False)
+
+  def pop(self, key):
+    self.version += 1
+    return self._data.pop(key, (None, None))[0]
+
+  def evict(self, predicate):
+    self.version += 1
+    keys = [key for key in self._data if predicate(key)]
+    for key in keys:
+      del self._data[key]
+
+    return len(keys)
+
+  def clear(self):
+    self.version += 1
+    self._data.clear()
+
+  def stats(self):
+    total = self.hits + self.misses
+    return {"size": len(self._data), "max_size": self.size, "ttl": self.ttl, "hits": self.hits, "misses": self.misses,
+      "ratio": self.hits / total if total else 0}
@@ -0,0 +1,35 @@
+from contextvars import ContextVar
+
+current = ContextVar("ySanic_identity_map", default = None)
+
+class IdentityMap:
+  """
+  The models loaded during a request by (path, slug) and by _id
+  Every document is asked and validated once by request and whoever loads it again gets the same model
+  """
+  def __init__(self):
+    self.by_key = {}
+    self.by_id = {}
+
+  def __len__(self):
+    return len(self.by_key)
+
+  def get(self, key):
+    return self.by_key.get(key, None)
+
+  def get_by_id(self, _id):
+    return self.by_id.get(_id, None)
+
+  def add(self, key, model):
+    self.by_key[key] = model
+    _id = model.get_data().get("_id", None)
+    if _id is not None:
+      self.by_id[_id] = model
+
+  def evict(self, predicate):
+    keys = [key for key in self.by_key if predicate(key)]
+    for key in keys:
+      model = self.by_key.pop(key)
+      self.by_id.pop(model.get_data().get("_id", None), None)
+
+    return len(keys)
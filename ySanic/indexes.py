@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+from marshmallow import fields
+from pymongo import ASCENDING, DESCENDING
+
+Index = namedtuple("Index", ["keys", "unique", "reason"])
+QueryShape = namedtuple("QueryShape", ["fields", "origin"])
+
+# every document is reached by (path, slug) and the ones under the same parent by path (its prefix)
+TREE_INDEXES = (
+  Index((("path", ASCENDING), ("slug", ASCENDING)), False, "the paths of the trees"),
+)
+
+TREE_QUERIES = (
+  QueryShape(("path",), "get_root, the lists of children, siblings and subtrees (anchored regex)"),
+  QueryShape(("path", "slug"), "get_paths and resolve_path")
+)
+
+GRIDFS_INDEXES = {
+  "files": (Index((("filename", ASCENDING), ("uploadDate", DESCENDING)), False, "open_file and file_response"),),
+  "chunks": (Index((("files_id", ASCENDING), ("n", ASCENDING)), True, "the chunks of the files"),)
+}
+
+GRIDFS_QUERIES = {
+  "files": (QueryShape(("filename",), "open_file and file_response"),),
+  "chunks": (QueryShape(("files_id", "n"), "reading the files"),)
+}
+
+def _models(checkings):
+  root = checkings.get("root")
+  return [model for _, model, _ in ([root] if root else []) + checkings.get("trees", [])]
+
+def _field_indexes(model):
+  # the emails are looked up by the models' exists and the fields can ask for an index with index = True or unique = True
+  for name, field in model._declared_fields.items():
+    unique = field.metadata.get("unique", False)
+    if unique or field.metadata.get("index", False) or isinstance(field, fields.Email):
+      yield field.attribute or name, unique
+
+def model_indexes(checkings, unique_paths = False):
+  """
+  The indexes the trees collection needs: the ones of the paths and the ones of the models' fields
+  With unique_paths two documents can't have the same (path, slug)
+  """
+  indexes = {index.keys: index._replace(unique = index.unique or unique_paths) for index in TREE_INDEXES}
+  for model in _models(checkings):
+    for name, unique in _field_indexes(model):
+      keys = ((name, ASCENDING),)
+      if keys not in indexes or (unique and not indexes[keys].unique):
+        indexes[keys] = Index(keys, unique, "{}.{}".format(model.__name__, name))
+
+  return list(indexes.values())
+
+def query_shapes(checkings):
+  """The fields of the queries ySanic (and the models' lookups by field) send to the trees collection"""
+  shapes = {shape.fields: shape.origin for shape in TREE_QUERIES}
+  for model in _models(checkings):
+    for name, _ in _field_indexes(model):
+      origin = "{}.{}".format(model.__name__, name)
+      shapes[(name,)] = "{}, {}".format(shapes[(name,)], origin) if (name,) in shapes else origin
+
+  return [QueryShape(fields, origin) for fields, origin in shapes.items()]
+
+def covers(keys, shape):
+  """If an index with these keys can be used by a query on the fields of the shape (its first key is one of them)"""
+  return bool(keys) and keys[0][0] in shape.fields
+
+def uncovered(shapes, index_information):
+  """The shapes that no index (the result of index_information) can serve but _id"""
+  keys = [tuple(info["key"]) for info in index_information.values()]
+  return [shape for shape in shapes if shape.fields != ("_id",) and not any(covers(index, shape) for index in keys)]
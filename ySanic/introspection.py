@@ -0,0 +1,108 @@
+import pickle
+import sys
+from hashlib import sha256
+from importlib import import_module
+from inspect import isclass, ismethod
+from os import replace, stat, unlink, path as os_path
+from stat import S_IWGRP, S_IWOTH
+from tempfile import NamedTemporaryFile
+from types import MappingProxyType
+
+# the exceptions of a missing, truncated or outdated (a class that is not there anymore) snapshot
+LOAD_ERRORS = (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError, ValueError)
+
+def _source_file(obj):
+  filename = getattr(obj, "__file__", None)
+  if filename is None:
+    filename = getattr(sys.modules.get(getattr(obj, "__module__", None)), "__file__", None)
+
+  return filename
+
+def source_key(models, app_class):
+  """
+  The hash of the sources the introspection depends on: the models module, the modules of every class in it and of their bases
+  (the models imported from elsewhere and yModel's or marshmallow's schemas) and the modules of the app's class and its bases
+  Any change on them gives another key so the snapshot is not used
+  """
+  hasher = sha256(sys.version.encode("utf-8"))
+  filenames = [_source_file(models)]
+  for obj in vars(models).values():
+    if isclass(obj):
+      filenames.extend(_source_file(class_) for class_ in obj.__mro__)
+  filenames.extend(_source_file(class_) for class_ in app_class.__mro__)
+  for filename in dict.fromkeys(filenames):
+    if filename is not None and os_path.isfile(filename):
+      hasher.update(filename.encode("utf-8"))
+      with open(filename, "rb") as f:
+        hasher.update(f.read())
+
+  return hasher.hexdigest()
+
+class _Pickler(pickle.Pickler):
+  # classes are saved by name and the app's members (the routes' endpoints) by member name
+  def __init__(self, file, app):
+    super().__init__(file, pickle.HIGHEST_PROTOCOL)
+    self.app = app
+
+  def persistent_id(self, obj):
+    if isclass(obj):
+      return ("class", obj.__module__, obj.__qualname__)
+    elif ismethod(obj) and obj.__self__ is self.app:
+      return ("app", obj.__name__)
+
+    return None
+
+class _Unpickler(pickle.Unpickler):
+  def __init__(self, file, app):
+    super().__init__(file)
+    self.app = app
+
+  def persistent_load(self, pid):
+    if pid[0] == "app":
+      return getattr(self.app, pid[1])
+
+    obj = import_module(pid[1])
+    for name in pid[2].split("."):
+      obj = getattr(obj, name)
+    return obj
+
+def dump(filename, key, checkings, app):
+  """Saves the result of ySanic._checks (with its paths) to filename, replacing the old one at once"""
+  data = dict(checkings)
+  # the members are looked up again on load so only their names are saved
+  data["dispatch"] = {entry: endpoint._replace(method = None) for entry, endpoint in checkings["dispatch"].items()}
+  data["members"] = dict(checkings["members"])
+
+  directory = os_path.dirname(os_path.abspath(filename))
+  with NamedTemporaryFile("wb", dir = directory, delete = False) as f:
+    try:
+      _Pickler(f, app).dump((key, data))
+    except Exception:
+      f.close()
+      unlink(f.name)
+      raise
+  replace(f.name, filename)
+
+def load(filename, key, app):
+  """
+  The result of ySanic._checks saved in filename if it was saved with the same key, None otherwise
+  The file is unpickled, which runs whatever it says, so it's ignored if the group or the others can write it
+  (dump creates it readable and writable only by its owner)
+  """
+  try:
+    if stat(filename).st_mode & (S_IWGRP | S_IWOTH):
+      return None
+
+    with open(filename, "rb") as f:
+      saved_key, data = _Unpickler(f, app).load()
+  except LOAD_ERRORS:
+    return None
+
+  if saved_key != key:
+    return None
+
+  data["dispatch"] = MappingProxyType({
+    entry: endpoint._replace(method = getattr(entry[0], endpoint.name)) for entry, endpoint in data["dispatch"].items()
+  })
+  data["members"] = MappingProxyType(data["members"])
+  return data
@@ -0,0 +1,168 @@
+import asyncio
+from smtplib import SMTP_SSL, SMTPException
+
+def _settle(delivery, error = None):
+  # the delivery of a message out of the server is None and a cancelled one (the mailer stopped) stays like that
+  if delivery is None or delivery.done():
+    return
+
+  if error is None:
+    delivery.set_result(None)
+  else:
+    delivery.set_exception(error)
+
+def _retrieved(delivery):
+  # the failures are already logged, so nobody awaiting the delivery is not an error
+  if not delivery.cancelled():
+    delivery.exception()
+
+class Mailer:
+  """
+  Sends the emails out of the event loop
+  The messages wait in a bounded queue until one of the workers takes them, with as many others as MAIL_BATCH allows, and sends them
+  Every worker keeps its own authenticated connection (so the pool has MAIL_WORKERS connections) and closes it after MAIL_IDLE_TIMEOUT seconds without work
+  A failed message is retried MAIL_RETRIES times waiting MAIL_BACKOFF seconds, doubled on every attempt, with a new connection
+  Every queued message has a future of its delivery: it's done when the message is sent, has the error of the last attempt when it couldn't be
+  and it's cancelled when the mailer stops before sending it
+  """
+  def __init__(self, config, log):
+    self.config = config
+    self.log = log
+    self.queue = asyncio.Queue(config.get("MAIL_QUEUE_SIZE", 1000))
+    self.workers = []
+
+  def start(self):
+    for _ in range(self.config.get("MAIL_WORKERS", 1)):
+      self.workers.append(asyncio.ensure_future(self._worker()))
+
+  async def stop(self, timeout = None):
+    try:
+      await asyncio.wait_for(self.queue.join(), timeout)
+    except asyncio.TimeoutError:
+      self.log.warning("{} emails were not sent".format(self.queue.qsize()))
+
+    for worker in self.workers:
+      worker.cancel()
+    await asyncio.gather(*self.workers, return_exceptions = True)
+    self.workers = []
+
+    while not self.queue.empty():
+      _, _, delivery = self.queue.get_nowait()
+      delivery.cancel()
+      self.queue.task_done()
+
+  def _delivery(self):
+    delivery = asyncio.get_event_loop().create_future()
+    delivery.add_done_callback(_retrieved)
+    return delivery
+
+  def send(self, to, msg):
+    """Queues the message without waiting (raises asyncio.QueueFull when the queue is full) and returns the future of its delivery"""
+    delivery = self._delivery()
+    self.queue.put_nowait((to, msg, delivery))
+    return delivery
+
+  async def put(self, to, msg):
+    """Queues the message waiting for room if the queue is full and returns the future of its delivery"""
+    delivery = self._delivery()
+    await self.queue.put((to, msg, delivery))
+    return delivery
+
+  def connect(self):
+    server = SMTP_SSL(self.config["SMTP_SERVER"], self.config.get("SMTP_PORT", 587))
+    if self.config.get("SMTP_TLS", False):
+      server.starttls()
+    else:
+      server.ehlo()
+    server.login(self.config.get("SMTP_SENDER_LOGIN", self.config["SMTP_SENDER"]), self.config["SMTP_SENDER_PASSWORD"])
+    return server
+
+  def close(self, server):
+    if server is not None:
+      try:
+        server.quit()
+      except (SMTPException, OSError):
+        server.close()
+
+  def send_now(self, to, msg):
+    """Sends the message with a connection of its own, blocking until it's sent (raises the SMTP error otherwise)"""
+    server, failed = self._send_batch(None, [(to, msg, None)])
+    self.close(server)
+    if failed:
+      raise failed[0][1]
+
+  def _send_batch(self, server, batch):
+    failed = []
+    for message in batch:
+      to, msg, _ = message
+      try:
+        if server is None:
+          server = self.connect()
+        server.sendmail(self.config["SMTP_SENDER"], to, msg.as_string())
+      except (SMTPException, OSError) as e:
+        failed.append((message, e))
+        self.close(server)
+        server = None
+
+    return server, failed
+
+  async def _deliver(self, server, batch):
+    loop = asyncio.get_event_loop()
+    retries = self.config.get("MAIL_RETRIES", 3)
+    backoff = self.config.get("MAIL_BACKOFF", 1)
+    for attempt in range(retries + 1):
+      server, failed = await loop.run_in_executor(None, self._send_batch, server, batch)
+      pending = [message for message, _ in failed]
+      for message in batch:
+        if message not in pending:
+          _settle(message[2])
+      if not failed:
+        break
+
+      batch = pending
+      if attempt < retries:
+        await asyncio.sleep(backoff * 2 ** attempt)
+    else:
+      for (to, msg, delivery), error in failed:
+        self.log.error("Couldn't send '{}' to {}: {}".format(msg["Subject"], to, error))
+        _settle(delivery, error)
+
+    return server
+
+  async def _worker(self):
+    loop = asyncio.get_event_loop()
+    size = self.config.get("MAIL_BATCH", 10)
+    idle = self.config.get("MAIL_IDLE_TIMEOUT", 30)
+    server = None
+    try:
+      while True:
+        try:
+          batch = [await asyncio.wait_for(self.queue.get(), idle if server is not None else None)]
+        except asyncio.TimeoutError:
+          await loop.run_in_executor(None, self.close, server)
+          server = None
+          continue
+
+        while len(batch) < size:
+          try:
+            batch.append(self.queue.get_nowait())
+          except asyncio.QueueEmpty:
+            break
+
+        try:
+          server = await self._deliver(server, batch)
+        except asyncio.CancelledError:
+          for _, _, delivery in batch:
+            delivery.cancel()
+          raise
+        except Exception as e:
+          self.log.exception(e)
+          for _, _, delivery in batch:
+            _settle(delivery, e)
+        finally:
+          for _ in batch:
+            self.queue.task_done()
+    finally:
+      # QUIT waits for the server so it's sent from the executor even when the worker is cancelled
+      if server is not None:
+        await loop.run_in_executor(None, self.close, server)
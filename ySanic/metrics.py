@@ -0,0 +1,75 @@
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value):
+  return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(**labels):
+  return "{{{}}}".format(",".join('{}="{}"'.format(name, _escape(value)) for name, value in labels.items())) if labels else ""
+
+class Histogram:
+  def __init__(self, buckets):
+    self.buckets = buckets
+    self.counts = [0] * len(buckets)
+    self.sum = 0
+    self.count = 0
+
+  def observe(self, value):
+    for idx, bound in enumerate(self.buckets):
+      if value <= bound:
+        self.counts[idx] += 1
+    self.sum += value
+    self.count += 1
+
+  def lines(self, name, **labels):
+    for bound, count in zip(self.buckets, self.counts):
+      yield "{}_bucket{} {}".format(name, _labels(le = bound, **labels), count)
+    yield "{}_bucket{} {}".format(name, _labels(le = "+Inf", **labels), self.count)
+    yield "{}_sum{} {}".format(name, _labels(**labels), self.sum)
+    yield "{}_count{} {}".format(name, _labels(**labels), self.count)
+
+class Metrics:
+  """
+  Counters and histograms of the worker in the Prometheus text format
+  Every worker keeps its own numbers so each one has to be scraped (or aggregated) separately
+  """
+  def __init__(self):
+    self.requests = {}
+    self.latency = {}
+    self.queries = {}
+    self.resolutions = {"found": 0, "not_found": 0}
+
+  def observe_request(self, operation, method, status, duration, queries):
+    key = (operation, method, status)
+    self.requests[key] = self.requests.get(key, 0) + 1
+
+    if operation not in self.latency:
+      self.latency[operation] = Histogram(LATENCY_BUCKETS)
+      self.queries[operation] = Histogram(QUERIES_BUCKETS)
+    self.latency[operation].observe(duration)
+    self.queries[operation].observe(queries)
+
+  def observe_resolution(self, found):
+    self.resolutions["found" if found else "not_found"] += 1
+
+  def render(self, gauges = None):
+    lines = ["# HELP ysanic_requests_total Requests by operation, method and status", "# TYPE ysanic_requests_total counter"]
+    for (operation, method, status), count in sorted(self.requests.items()):
+      lines.append("ysanic_requests_total{} {}".format(_labels(operation = operation, method = method, status = status), count))
+
+    lines += ["# HELP ysanic_request_duration_seconds Latency by operation", "# TYPE ysanic_request_duration_seconds histogram"]
+    for operation, histogram in sorted(self.latency.items()):
+      lines.extend(histogram.lines("ysanic_request_duration_seconds", operation = operation))
+
+    lines += ["# HELP ysanic_mongo_queries Mongo queries issued by ySanic per request", "# TYPE ysanic_mongo_queries histogram"]
+    for operation, histogram in sorted(self.queries.items()):
+      lines.extend(histogram.lines("ysanic_mongo_queries", operation = operation))
+
+    lines += ["# HELP ysanic_resolutions_total Path resolutions by result", "# TYPE ysanic_resolutions_total counter"]
+    for result, count in self.resolutions.items():
+      lines.append("ysanic_resolutions_total{} {}".format(_labels(result = result), count))
+
+    for name, (help_, value) in (gauges or {}).items():
+      lines += ["# HELP {} {}".format(name, help_), "# TYPE {} gauge".format(name), "{} {}".format(name, value)]
+
+    return "\n".join(lines) + "\n"
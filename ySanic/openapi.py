@@ -0,0 +1,133 @@
+from gzip import compress
+from hashlib import sha1
+from json import dumps
+
+from marshmallow import fields
+from marshmallow.utils import missing
+
+from yModel.mongo import ObjectId, Decimal
+
+# the most specific classes first since the lookup follows the order
+FIELD_TYPES = (
+  (fields.Email, {"type": "string", "format": "email"}),
+  (fields.Url, {"type": "string", "format": "uri"}),
+  (fields.UUID, {"type": "string", "format": "uuid"}),
+  (fields.String, {"type": "string"}),
+  (fields.Integer, {"type": "integer"}),
+  (fields.Decimal, {"type": "number"}),
+  (fields.Number, {"type": "number"}),
+  (fields.Boolean, {"type": "boolean"}),
+  (fields.DateTime, {"type": "string", "format": "date-time"}),
+  (fields.Date, {"type": "string", "format": "date"}),
+  (fields.Time, {"type": "string"}),
+  (fields.Dict, {"type": "object"}),
+  (ObjectId, {"type": "string", "format": "objectid"}),
+  (Decimal, {"type": "string", "format": "decimal"})
+)
+
+def field_to_openapi(field, schemas):
+  """The OpenAPI schema of a marshmallow field, the nested schemas are added to schemas to be converted too"""
+  if isinstance(field, fields.Nested):
+    nested = field.nested if isinstance(field.nested, type) else field.nested.__class__
+    schemas[nested.__name__] = nested
+    ref = {"$ref": "#/components/schemas/{}".format(nested.__name__)}
+    result = {"type": "array", "items": ref} if field.many else ref
+  elif isinstance(field, fields.List):
+    result = {"type": "array", "items": field_to_openapi(field.container, schemas)}
+  else:
+    result = next((dict(type_) for class_, type_ in FIELD_TYPES if isinstance(field, class_)), {})
+
+  if field.missing is not missing and field.missing is not None and not callable(field.missing):
+    try:
+      dumps(field.missing)
+      result["default"] = field.missing
+    except TypeError:
+      pass
+
+  if "description" in field.metadata:
+    result["description"] = field.metadata["description"]
+
+  return result
+
+def schema_to_openapi(schema, schemas):
+  """The OpenAPI object of a marshmallow schema class, with the names the data has once loaded (the attribute if any)"""
+  properties = {}
+  required = []
+  for name, field in schema._declared_fields.items():
+    if field.load_only:
+      continue
+
+    name = field.attribute or name
+    properties[name] = field_to_openapi(field, schemas)
+    if field.required:
+      required.append(name)
+
+  result = {"type": "object", "properties": properties}
+  if required:
+    result["required"] = required
+  if schema.__doc__:
+    result["description"] = schema.__doc__.strip()
+
+  return result
+
+def _merge(target, source):
+  for key, value in source.items():
+    if isinstance(value, dict) and isinstance(target.get(key, None), dict):
+      _merge(target[key], value)
+    elif isinstance(value, list) and isinstance(target.get(key, None), list):
+      target[key].extend(element for element in value if element not in target[key])
+    else:
+      target[key] = value
+
+def _str_keys(data):
+  # the responses are keyed by the code (int) and JSON only has string keys
+  if isinstance(data, dict):
+    return {str(key): _str_keys(value) for key, value in data.items()}
+  elif isinstance(data, list):
+    return [_str_keys(value) for value in data]
+
+  return data
+
+def _describe_responses(paths):
+  # OpenAPI requires the description of every response and the decorators can leave it as None (paths is a copy, see _str_keys)
+  for operations in paths.values():
+    for operation in operations.values():
+      for response in operation.get("responses", {}).values() if isinstance(operation, dict) else ():
+        if response.get("description", None) is None:
+          response["description"] = ""
+
+  return paths
+
+def build_document(checkings, title, version):
+  """The OpenAPI 3 document of the root and trees collected by ySanic._checks"""
+  paths = {}
+  params = {}
+  pending = {}
+  for checks in ([checkings["root"]] if checkings.get("root") else []) + checkings.get("trees", []):
+    _merge(paths, checks[2].get("routes", {}))
+    params.update(checks[2].get("params", {}))
+    pending.update(checks[2].get("schemas", {}))
+
+  schemas = {}
+  while pending:
+    name, schema = pending.popitem()
+    if name not in schemas:
+      schemas[name] = schema_to_openapi(schema, pending)
+
+  return {
+    "openapi": "3.0.2",
+    "info": {"title": title, "version": version},
+    "paths": _describe_responses(_str_keys(paths)),
+    "components": {"parameters": params, "schemas": {name: schemas[name] for name in sorted(schemas)}}
+  }
+
+class Document:
+  """The encoded document with its ETag and its gzip variant, ready to be served as is"""
+  __slots__ = ("body", "gzip", "etag", "gzip_etag")
+
+  def __init__(self, document):
+    self.body = dumps(document, sort_keys = True, separators = (",", ":")).encode("utf-8")
+    self.gzip = compress(self.body)
+    digest = sha1(self.body).hexdigest()
+    self.etag = '"{}"'.format(digest)
+    self.gzip_etag = '"{}-gzip"'.format(digest)
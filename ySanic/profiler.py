@@ -0,0 +1,157 @@
+from asyncio import ensure_future, gather
+from contextvars import ContextVar
+from time import perf_counter
+
+current = ContextVar("ySanic_profile", default = None)
+
+# the operations that go to the server at once (find and aggregate give a cursor that goes when it's read)
+OPERATIONS = ("find_one", "count_documents", "insert_one", "insert_many", "update_one", "update_many", "delete_one", "delete_many", "replace_one")
+
+class Profile:
+  """The queries a request sends to the table: the operation, its filter, how long it took and how many documents it touched"""
+  def __init__(self, request_id, method, url, client_id = None):
+    self.request_id = request_id
+    self.client_id = client_id
+    self.method = method
+    self.url = url
+    self.queries = []
+    self.pending = set()
+
+  async def finish(self):
+    """Waits for the operations of the request nobody awaited (yModel's update doesn't) so they are in the profile too"""
+    while self.pending:
+      pending, self.pending = self.pending, set()
+      await gather(*pending, return_exceptions = True)
+
+  def add(self, operation, query, duration, documents):
+    entry = {"operation": operation, "filter": query, "ms": duration * 1000, "documents": documents}
+    self.queries.append(entry)
+    return entry
+
+  def to_dict(self):
+    return {
+      "request_id": self.request_id, "client_id": self.client_id, "method": self.method, "url": self.url,
+      "round_trips": len(self.queries), "ms": sum(entry["ms"] for entry in self.queries),
+      "collscans": sum(1 for entry in self.queries if entry.get("collscan", False)),
+      "queries": self.queries
+    }
+
+def stages(plan):
+  """The stages of a plan of explain, from the top one down"""
+  while plan:
+    yield plan.get("stage", None)
+    for inputs in plan.get("inputStages", []):
+      yield from stages(inputs)
+    plan = plan.get("inputStage", plan.get("queryPlan", None))
+
+def _documents(result):
+  if result is None:
+    return 0
+  elif isinstance(result, int):
+    return result
+  elif isinstance(result, dict):
+    return 1
+  for name in ("modified_count", "deleted_count", "inserted_ids"):
+    if hasattr(result, name):
+      value = getattr(result, name)
+      return len(value) if isinstance(value, list) else value
+
+  return 1
+
+def _filter(operation, args, kwargs):
+  if operation.startswith("insert"):
+    return None
+  elif operation == "aggregate":
+    return args[0] if args else kwargs.get("pipeline", [])
+
+  return args[0] if args else kwargs.get("filter", {})
+
+class ProfiledTable:
+  """
+  A proxy of a Motor collection that adds every query to the Profile of the current request
+  With explain each query is explained afterwards (out of its time) and COLLSCANs are flagged
+  """
+  def __init__(self, table, explain = False):
+    self.table = table
+    self.explain = explain
+
+  def __getattr__(self, name):
+    attribute = getattr(self.table, name)
+    if name in OPERATIONS:
+      return lambda *args, **kwargs: self._schedule(name, attribute, args, kwargs)
+    elif name in ("find", "aggregate"):
+      return lambda *args, **kwargs: ProfiledCursor(self, name, attribute(*args, **kwargs), _filter(name, args, kwargs))
+
+    return attribute
+
+  def _schedule(self, name, method, args, kwargs):
+    # scheduled at once like Motor's, so an operation nobody awaits still runs
+    future = ensure_future(self._operation(name, method, args, kwargs))
+    profile = current.get()
+    if profile is not None:
+      profile.pending.add(future)
+    return future
+
+  async def _operation(self, name, method, args, kwargs):
+    started = perf_counter()
+    result = await method(*args, **kwargs)
+    await self.record(name, _filter(name, args, kwargs), perf_counter() - started, _documents(result))
+    return result
+
+  async def record(self, operation, query, duration, documents):
+    profile = current.get()
+    if profile is None:
+      return
+
+    entry = profile.add(operation, query, duration, documents)
+    if self.explain and query is not None:
+      # the pipelines are explained by the filter of their first $match
+      if isinstance(query, list):
+        query = query[0].get("$match", {}) if query else {}
+      explained = await self.table.find(query).explain()
+      plan = explained.get("queryPlanner", {}).get("winningPlan", {})
+      entry["plan"] = [stage for stage in stages(plan) if stage]
+      entry["collscan"] = "COLLSCAN" in entry["plan"]
+
+class ProfiledCursor:
+  """A cursor of find or aggregate that is added to the profile once it's read"""
+  def __init__(self, table, operation, cursor, query):
+    self.table = table
+    self.operation = operation
+    self.cursor = cursor
+    self.query = query
+    self.documents = 0
+    self.duration = 0
+
+  def __getattr__(self, name):
+    attribute = getattr(self.cursor, name)
+    if name in ("sort", "skip", "limit", "batch_size", "hint", "collation", "max_time_ms"):
+      def chained(*args, **kwargs):
+        attribute(*args, **kwargs)
+        return self
+      return chained
+
+    return attribute
+
+  async def to_list(self, length):
+    started = perf_counter()
+    docs = await self.cursor.to_list(length)
+    await self.table.record(self.operation, self.query, perf_counter() - started, len(docs))
+    return docs
+
+  def __aiter__(self):
+    self._iterator = self.cursor.__aiter__()
+    return self
+
+  async def __anext__(self):
+    started = perf_counter()
+    try:
+      doc = await self._iterator.__anext__()
+    except StopAsyncIteration:
+      self.duration += perf_counter() - started
+      await self.table.record(self.operation, self.query, self.duration, self.documents)
+      raise
+
+    self.duration += perf_counter() - started
+    self.documents += 1
+    return doc
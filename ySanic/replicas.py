@@ -0,0 +1,32 @@
+from contextvars import ContextVar
+from time import time
+
+from pymongo.read_preferences import Nearest, Secondary, SecondaryPreferred
+
+# True while a request that only reads may be served by the secondaries
+current = ContextVar("ySanic_replica_reads", default = False)
+
+PREFERENCES = {"secondaryPreferred": SecondaryPreferred, "secondary": Secondary, "nearest": Nearest}
+
+def read_preference(mode, max_staleness = None):
+  """The read preference of READ_REPLICAS (True is secondaryPreferred) with READ_MAX_STALENESS (seconds, at least 90 for the server)"""
+  mode = "secondaryPreferred" if mode is True else mode
+  if not isinstance(mode, str) or mode not in PREFERENCES:
+    raise ValueError("READ_REPLICAS must be True or one of {}, not {!r}".format(", ".join(PREFERENCES), mode))
+
+  preference = PREFERENCES[mode]
+  return preference(max_staleness = max_staleness) if max_staleness else preference()
+
+def pinned(request, cookie):
+  """If the client wrote a moment ago (its cookie is still in the future) so it has to read from the primary"""
+  try:
+    return float(request.cookies.get(cookie, 0)) > time()
+  except ValueError:
+    return False
+
+def pin(response, cookie, window):
+  """Sends the client to the primary for window seconds"""
+  response.cookies[cookie] = str(int(time() + window))
+  response.cookies[cookie]["path"] = "/"
+  response.cookies[cookie]["max-age"] = int(window)
+  response.cookies[cookie]["httponly"] = True
@@ -0,0 +1,71 @@
+from contextvars import ContextVar
+from time import perf_counter
+
+current = ContextVar("ySanic_timings", default = None)
+
+class Timings:
+  """
+  The time spent by a request in each phase (resolve, mongo, load, handler, dump, serialize...)
+  A phase can happen several times in a request (every query is a mongo phase) so it keeps how many times and the total
+  """
+  def __init__(self):
+    self.start = perf_counter()
+    self.phases = {}
+    self.operation = None
+    self.status = None
+
+  def phase(self, name):
+    return Phase(self, name)
+
+  def add(self, name, duration):
+    phase = self.phases.get(name)
+    if phase is None:
+      self.phases[name] = [1, duration]
+    else:
+      phase[0] += 1
+      phase[1] += duration
+
+  def count(self, name):
+    return self.phases.get(name, (0, 0))[0]
+
+  def total(self):
+    return perf_counter() - self.start
+
+  def header(self):
+    metrics = []
+    for name, (count, duration) in self.phases.items():
+      desc = ';desc="{}x"'.format(count) if count > 1 else ""
+      metrics.append("{}{};dur={:.3f}".format(name, desc, duration * 1000))
+    metrics.append("total;dur={:.3f}".format(self.total() * 1000))
+
+    return ", ".join(metrics)
+
+class Phase:
+  __slots__ = ("timings", "name", "start")
+
+  def __init__(self, timings, name):
+    self.timings = timings
+    self.name = name
+
+  def __enter__(self):
+    self.start = perf_counter()
+    return self
+
+  def __exit__(self, *exc):
+    self.timings.add(self.name, perf_counter() - self.start)
+
+class NoPhase:
+  __slots__ = ()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    pass
+
+NO_PHASE = NoPhase()
+
+def timed(name):
+  """Times the block as the phase name of the current request's timings, if any"""
+  timings = current.get()
+  return NO_PHASE if timings is None else Phase(timings, name)